@@ -1,4 +1,7 @@
-from fastapi import APIRouter, HTTPException, Depends
+import orjson
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import insert, select
 from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.models.downtime import Downtime
@@ -7,21 +10,53 @@ from app.ml.model import predict_downtime
 
 router = APIRouter()
 
+# Columns returned by the list endpoint; selecting them directly skips ORM hydration
+DOWNTIME_COLUMNS = (
+    Downtime.id,
+    Downtime.machine_id,
+    Downtime.reason,
+    Downtime.duration_minutes,
+    Downtime.timestamp,
+)
+
 @router.post("/downtime/", response_model=DowntimeResponse)
 def create_downtime_event(event: DowntimeCreate, db: Session = Depends(get_db)):
-    new_event = Downtime(**event.dict())
-    db.add(new_event)
+    # INSERT ... RETURNING gives back the generated id/timestamp without a refresh query
+    new_event = db.execute(
+        insert(Downtime).values(**event.model_dump()).returning(Downtime)
+    ).scalar_one()
     db.commit()
-    db.refresh(new_event)
     return new_event
 
 @router.get("/downtime/", response_model=list[DowntimeResponse])
-def get_all_downtime_events(db: Session = Depends(get_db)):
-    return db.query(Downtime).all()
+def get_all_downtime_events(
+    limit: int = Query(100, ge=1, le=10000),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db),
+):
+    stmt = (
+        select(*DOWNTIME_COLUMNS)
+        .order_by(Downtime.id)
+        .limit(limit)
+        .offset(offset)
+        .execution_options(yield_per=500)
+    )
+    rows = db.execute(stmt)
+
+    def stream_rows():
+        # Emit a JSON array one row at a time so memory stays O(batch), not O(rows)
+        yield b"["
+        for i, row in enumerate(rows):
+            if i:
+                yield b","
+            yield orjson.dumps(dict(row._mapping))
+        yield b"]"
+
+    return StreamingResponse(stream_rows(), media_type="application/json")
 
 @router.get("/downtime/{event_id}", response_model=DowntimeResponse)
 def get_downtime_event(event_id: int, db: Session = Depends(get_db)):
-    event = db.query(Downtime).filter(Downtime.id == event_id).first()
+    event = db.get(Downtime, event_id)
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
     return event
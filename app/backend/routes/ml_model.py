@@ -1,4 +1,5 @@
 import pickle
+import threading
 import numpy as np
 
 MODEL_PATH = "ml_models/downtime_predictor.pkl"
@@ -7,12 +8,23 @@ MODEL_PATH = "ml_models/downtime_predictor.pkl"
 with open(MODEL_PATH, "rb") as f:
     model = pickle.load(f)
 
+# Reusable single-row input buffer, one per thread so concurrent
+# requests served from the threadpool never share it
+_local = threading.local()
+
+def _row_buffer():
+    buf = getattr(_local, "buf", None)
+    if buf is None:
+        buf = _local.buf = np.empty((1, model.n_features_in_), dtype=np.float64)
+    return buf
+
 def predict_downtime(features: list) -> float:
     """
     Predict downtime probability.
     :param features: list of numerical values [temp, vibration, load, shift, ...]
     :return: probability of downtime (0 to 1)
     """
-    features_array = np.array(features).reshape(1, -1)
-    probability = model.predict_proba(features_array)[0][1]  # Class 1 probability
+    buf = _row_buffer()
+    buf[0, :] = features
+    probability = model.predict_proba(buf)[0, 1]  # Class 1 probability
     return round(probability, 4)
@@ -1,6 +1,6 @@
 import pandas as pd
 from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestClassifier
+from sklearn.ensemble import HistGradientBoostingClassifier
 import pickle
 import os
 
@@ -16,8 +16,8 @@ X_train, X_test, y_train, y_test = train_test_split(
     X, y, test_size=0.2, random_state=42
 )
 
-# Train RandomForest model
-model = RandomForestClassifier(n_estimators=100, random_state=42)
+# Train gradient boosted trees
+model = HistGradientBoostingClassifier(max_iter=100, max_depth=6, learning_rate=0.1, random_state=42)
 model.fit(X_train, y_train)
 
 # Evaluate model
@@ -28,10 +28,42 @@ print(f"✅ Model Accuracy: {accuracy:.2f}")
 model_path = os.path.join("backend", "model", "downtime_predictor.pkl")
 os.makedirs(os.path.dirname(model_path), exist_ok=True)
 with open(model_path, "wb") as file:
-    pickle.dump(model, file)
+    pickle.dump(model, file, protocol=pickle.HIGHEST_PROTOCOL)
 
 print(f"💾 Model saved to: {model_path}")
 
+# Export to ONNX for the onnxruntime inference path in sensor.py (optional)
+try:
+    from skl2onnx import convert_sklearn
+    from skl2onnx.common.data_types import FloatTensorType
+
+    onnx_model = convert_sklearn(
+        model,
+        initial_types=[("X", FloatTensorType([None, X.shape[1]]))],
+        options={id(model): {"zipmap": False}},
+    )
+    onnx_path = os.path.join("backend", "model", "downtime_predictor.onnx")
+    with open(onnx_path, "wb") as file:
+        file.write(onnx_model.SerializeToString())
+    print(f"💾 ONNX model saved to: {onnx_path}")
+
+    # The ONNX graph runs in float32 (thresholds included), which is what makes it
+    # lighter than the float64 sklearn trees - check it still agrees on the test split
+    try:
+        import numpy as np
+        import onnxruntime
+
+        session = onnxruntime.InferenceSession(onnx_path, providers=["CPUExecutionProvider"])
+        onnx_labels = session.run(None, {"X": X_test.to_numpy(dtype=np.float32)})[0]
+        agreement = (onnx_labels == model.predict(X_test)).mean()
+        print(f"🔁 ONNX float32 agreement with sklearn: {agreement:.2%}")
+    except ImportError:
+        pass
+except ImportError:
+    print("⚠️ skl2onnx not installed - skipping ONNX export")
+except Exception as e:
+    print(f"⚠️ ONNX export failed, sensor.py will use the pickled model: {e}")
+
 # ---- Test Prediction ----
 # Example: Temperature=80, Vibration=0.4, Machine Load=0.85, Shift=3
 test_input = [[80, 0.4, 0.85, 3]]
@@ -1,75 +1,221 @@
 
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from app.core.database import get_db
+from fastapi import APIRouter
+from sqlalchemy import insert
+from app.core.config import settings
+from app.core.database import SessionLocal
 from app.models.downtime import Downtime
 from app.ml.model import predict_downtime
+import joblib
+import numpy as np
+import asyncio
+import logging
+import os
+from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
+# ONNX Runtime is optional - fall back to the pickled sklearn model without it
+try:
+    import onnxruntime
+    ONNX_AVAILABLE = True
+except ImportError:
+    ONNX_AVAILABLE = False
+
+# Twilio SMS alerts are optional
+try:
+    from app.backend.routes.utils.alerts import ALERTS_ENABLED, queue_alert, start_alert_worker
+except ImportError:
+    ALERTS_ENABLED = False
+
+MODEL_PATH = "backend/model/downtime_predictor.pkl"
+ONNX_MODEL_PATH = "backend/model/downtime_predictor.onnx"
+
+# Micro-batching: concurrent requests are stacked into one predict_proba call
+MAX_BATCH = 64
+MAX_WAIT_MS = 5
+
+# Downtime rows are written in batches: every FLUSH_INTERVAL_MS or FLUSH_MAX rows
+FLUSH_INTERVAL_MS = 500
+FLUSH_MAX = 100
+
+# Per-column threshold vectors for classify_batch, in input column order:
+# machine temperature, vibration, humidity, current
+_THRESHOLD_KEYS = ("machine_temperature", "vibration", "humidity", "current")
+_WARN_MIN = np.array([settings.THRESHOLDS[k].get("warning_min", -np.inf) for k in _THRESHOLD_KEYS])
+_WARN_MAX = np.array([settings.THRESHOLDS[k]["warning_max"] for k in _THRESHOLD_KEYS])
+_CRIT_MAX = np.array([settings.THRESHOLDS[k].get("critical_max", np.inf) for k in _THRESHOLD_KEYS])
+STATUS_LABELS = ("OK", "WARNING", "CRITICAL")
 
 router = APIRouter()
 
+# Model is deserialized once at startup and shared by all requests
+model = None
+onnx_session = None
 
-@router.post("/sensor-data/")
-def receive_sensor_data(machine_temperature: float, vibration_level: float, humidity: float, shift_time: int, db: Session = Depends(get_db)):
-    # Prepare features for model
-    features = [machine_temperature, vibration_level, humidity, shift_time]
-    
-    # Predict downtime
-    import joblib
-    import numpy as np
+# Pending (features, future) pairs waiting for the batch predictor,
+# created on startup so it belongs to the serving event loop
+request_queue: asyncio.Queue = None
+_batch_task = None
+_alert_task = None
+
+# Downtime rows waiting to be inserted by the flush worker
+_pending: list[dict] = []
+_flush_now: asyncio.Event = None
+_flush_task = None
+
+
+async def _batch_predictor():
+    """Drain queued requests in batches and resolve each request's future"""
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await request_queue.get()]
+        deadline = loop.time() + MAX_WAIT_MS / 1000
+        while len(batch) < MAX_BATCH:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(request_queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        try:
+            X = np.vstack([features for features, _ in batch])
+            probabilities = _predict_proba(X)
+            # Temperature, vibration and humidity columns of the same matrix
+            statuses = classify_batch(X[:, :3])
+        except Exception as e:
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(e)
+            continue
+
+        for (_, fut), probability, status in zip(batch, probabilities, statuses):
+            if not fut.done():
+                fut.set_result((float(probability), STATUS_LABELS[status]))
+
+
+def classify_batch(readings: np.ndarray) -> np.ndarray:
+    """Threshold status (index into STATUS_LABELS) for each row of readings.
+
+    Columns follow _THRESHOLD_KEYS; trailing columns may be omitted, e.g. an
+    (N, 3) array without current.
+    """
+    n = readings.shape[1]
+    levels = np.select(
+        [readings > _CRIT_MAX[:n], (readings > _WARN_MAX[:n]) | (readings < _WARN_MIN[:n])],
+        [2, 1],
+        0,
+    )
+    return levels.max(axis=1)
+
+
+def _predict_proba(X):
+    """Downtime probability for each row of X, via ONNX Runtime when loaded"""
+    if onnx_session is not None:
+        # Outputs are [label, probabilities]; the model is exported without zipmap
+        return onnx_session.run(None, {"X": X.astype(np.float32)})[1][:, 1]
+    if hasattr(model, 'predict_proba'):
+        return model.predict_proba(X)[:, 1]
+    return model.predict(X).astype(float)
+
+
+def _insert_rows(rows):
+    db = SessionLocal()
     try:
-        model = joblib.load("backend/model/downtime_predictor.pkl")
-        if hasattr(model, 'predict_proba'):
-            probability = model.predict_proba(np.array(features).reshape(1, -1))[0][1]
-        else:
-            probability = float(model.predict(np.array(features).reshape(1, -1))[0])
+        db.execute(insert(Downtime), rows)
+        db.commit()
+    finally:
+        db.close()
+
+
+async def _flush_pending():
+    """Insert everything buffered so far in one executemany + commit"""
+    if not _pending:
+        return
+    rows = _pending[:]
+    _pending.clear()
+    try:
+        await asyncio.to_thread(_insert_rows, rows)
     except Exception as e:
-        probability = None
-        return {"status": "error", "detail": str(e)}
+        logger.error(f"Failed to store {len(rows)} sensor events: {e}")
+
+
+async def _flush_worker():
+    while True:
+        try:
+            await asyncio.wait_for(_flush_now.wait(), FLUSH_INTERVAL_MS / 1000)
+        except asyncio.TimeoutError:
+            pass
+        _flush_now.clear()
+        await _flush_pending()
 
-    # Store in DB
-    event = Downtime(
-        machine_id="sensor", # or pass as param if available
-        reason="Sensor data",
-        duration_minutes=0.0,
-        timestamp=None # will default to now
-    )
-    db.add(event)
-    db.commit()
 
-    return {"status": "success", "downtime_probability": probability}
+@router.on_event("startup")
+async def load_model():
+    global model, onnx_session, request_queue, _batch_task, _alert_task, _flush_now, _flush_task
+    try:
+        model = joblib.load(MODEL_PATH)
+        logger.info(f"Loaded sensor model from {MODEL_PATH}")
+    except Exception as e:
+        logger.error(f"Failed to load sensor model from {MODEL_PATH}: {e}")
+        model = None
+
+    if ONNX_AVAILABLE and os.path.exists(ONNX_MODEL_PATH):
+        try:
+            onnx_session = onnxruntime.InferenceSession(ONNX_MODEL_PATH, providers=["CPUExecutionProvider"])
+            logger.info(f"Using ONNX Runtime model from {ONNX_MODEL_PATH}")
+        except Exception as e:
+            logger.warning(f"ONNX model load failed, using sklearn model: {e}")
+            onnx_session = None
+
+    request_queue = asyncio.Queue()
+    _batch_task = asyncio.create_task(_batch_predictor())
+
+    _flush_now = asyncio.Event()
+    _flush_task = asyncio.create_task(_flush_worker())
+
+    if ALERTS_ENABLED:
+        _alert_task = start_alert_worker()
+
+
+@router.on_event("shutdown")
+async def stop_background_tasks():
+    if _batch_task:
+        _batch_task.cancel()
+    if _alert_task:
+        _alert_task.cancel()
+    if _flush_task:
+        _flush_task.cancel()
+    # Don't lose events that arrived since the last flush
+    await _flush_pending()
 
-# If you want to send alerts, uncomment and implement send_alert in app/utils/alerts.py
-# from app.utils.alerts import send_alert
 
-# Single endpoint definition using Downtime ORM model
 @router.post("/sensor-data/")
-def receive_sensor_data(machine_temperature: float, vibration_level: float, humidity: float, shift_time: int, db: Session = Depends(get_db)):
-    features = [machine_temperature, vibration_level, humidity, shift_time]
-    import joblib
-    import numpy as np
+async def receive_sensor_data(machine_temperature: float, vibration_level: float, humidity: float, shift_time: int):
+    features = np.array([machine_temperature, vibration_level, humidity, shift_time], dtype=np.float64)
     try:
-        model = joblib.load("backend/model/downtime_predictor.pkl")
-        if hasattr(model, 'predict_proba'):
-            probability = model.predict_proba(np.array(features).reshape(1, -1))[0][1]
-        else:
-            probability = float(model.predict(np.array(features).reshape(1, -1))[0])
+        if model is None and onnx_session is None:
+            raise RuntimeError(f"Model not loaded from {MODEL_PATH}")
+        fut = asyncio.get_running_loop().create_future()
+        await request_queue.put((features, fut))
+        probability, sensor_status = await fut
     except Exception as e:
         probability = None
         return {"status": "error", "detail": str(e)}
 
-    # Store in DB
-    event = Downtime(
-        machine_id="sensor", # or pass as param if available
-        reason="Sensor data",
-        duration_minutes=0.0,
-        timestamp=None # will default to now
-    )
-    db.add(event)
-    db.commit()
+    # Store in DB (buffered, written by the flush worker)
+    _pending.append({
+        "machine_id": "sensor", # or pass as param if available
+        "reason": "Sensor data",
+        "duration_minutes": 0.0,
+        "timestamp": datetime.utcnow(),
+    })
+    if len(_pending) >= FLUSH_MAX:
+        _flush_now.set()
 
-    # 🚨 Trigger alert if probability high
-    # if probability is not None and probability > 0.7:
-    #     send_alert(machine_temperature, vibration_level, probability)
+    # 🚨 Trigger alert if probability high (queued, sent by the alert worker)
+    if ALERTS_ENABLED and probability is not None and probability > 0.7:
+        queue_alert(machine_temperature, vibration_level, probability)
 
-    return {"status": "success", "downtime_probability": probability}
+    return {"status": "success", "downtime_probability": probability, "sensor_status": sensor_status}
@@ -1,18 +1,62 @@
 from twilio.rest import Client
+import asyncio
+import functools
+import logging
 import os
 
+logger = logging.getLogger(__name__)
+
 # Load from environment variables
 TWILIO_SID = os.getenv("TWILIO_ACCOUNT_SID")
 TWILIO_AUTH = os.getenv("TWILIO_AUTH_TOKEN")
 TWILIO_PHONE = os.getenv("TWILIO_PHONE_NUMBER")
 ALERT_PHONE = os.getenv("ALERT_PHONE_NUMBER")  # Maintenance team phone
 
-client = Client(TWILIO_SID, TWILIO_AUTH)
+# Alerts are only sent when Twilio is fully configured
+ALERTS_ENABLED = all([TWILIO_SID, TWILIO_AUTH, TWILIO_PHONE, ALERT_PHONE])
+
+ALERT_QUEUE_SIZE = 100
+ALERT_MIN_INTERVAL = 30  # seconds between SMS alerts
+
+# Pending alerts, consumed by the worker started with start_alert_worker()
+alert_queue: asyncio.Queue = None
+
+@functools.lru_cache(maxsize=1)
+def _get_client():
+    return Client(TWILIO_SID, TWILIO_AUTH)
 
 def send_alert(machine_temp, vibration, probability):
+    """Send an SMS alert (blocking Twilio HTTP call)"""
     message = f"⚠️ Downtime Risk Alert!\nTemp: {machine_temp}°C\nVibration: {vibration}\nRisk: {probability*100:.2f}%"
-    client.messages.create(
+    _get_client().messages.create(
         body=message,
         from_=TWILIO_PHONE,
         to=ALERT_PHONE
     )
+
+def queue_alert(machine_temp, vibration, probability):
+    """Queue an alert for the background worker without blocking the caller"""
+    if alert_queue is None:
+        logger.warning("Alert worker not running, dropping alert")
+        return
+    try:
+        alert_queue.put_nowait((machine_temp, vibration, probability))
+    except asyncio.QueueFull:
+        logger.warning("Alert queue full, dropping alert")
+
+async def _alert_worker():
+    while True:
+        machine_temp, vibration, probability = await alert_queue.get()
+        try:
+            # Twilio's client is synchronous, keep it off the event loop
+            await asyncio.to_thread(send_alert, machine_temp, vibration, probability)
+        except Exception as e:
+            logger.error(f"Alert send failed: {e}")
+        # Rate-limit SMS traffic during sustained high-risk periods
+        await asyncio.sleep(ALERT_MIN_INTERVAL)
+
+def start_alert_worker():
+    """Create the alert queue and start its consumer on the running loop"""
+    global alert_queue
+    alert_queue = asyncio.Queue(maxsize=ALERT_QUEUE_SIZE)
+    return asyncio.create_task(_alert_worker())
@@ -1,11 +1,30 @@
+import functools
 import pickle
+import threading
 import numpy as np
 
-# Load pre-trained ML model
-with open("ml_model.pkl", "rb") as file:
-    model = pickle.load(file)
+# Model written by app/backend/routes/model/train_model.py
+MODEL_PATH = "backend/model/downtime_predictor.pkl"
+
+@functools.lru_cache(maxsize=1)
+def _get_model():
+    """Load pre-trained ML model once, on first prediction"""
+    with open(MODEL_PATH, "rb") as file:
+        return pickle.load(file)
+
+# Reusable single-row input buffer, one per thread
+_local = threading.local()
+
+def _row_buffer(n_features):
+    buf = getattr(_local, "buf", None)
+    if buf is None:
+        buf = _local.buf = np.empty((1, n_features), dtype=np.float64)
+    return buf
 
 def predict_downtime(features: list):
     """Takes input features and returns downtime probability"""
-    prediction = model.predict_proba(np.array(features))[0][1]
+    model = _get_model()
+    buf = _row_buffer(model.n_features_in_)
+    buf[0, :] = features
+    prediction = model.predict_proba(buf)[0, 1]
     return round(float(prediction), 4)  # Probability of downtime
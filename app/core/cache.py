@@ -0,0 +1,54 @@
+# app/core/cache.py
+import os
+import time
+import logging
+import orjson
+
+logger = logging.getLogger(__name__)
+
+# Redis is optional - without it (or without REDIS_URL) responses are cached in-process
+try:
+    import redis.asyncio as redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+REDIS_URL = os.getenv("REDIS_URL")
+
+# Short TTL: dashboards poll every few seconds and tolerate slightly stale numbers
+DEFAULT_TTL = 3
+
+class ResponseCache:
+    """Tiny get/set cache for read-mostly API responses"""
+
+    def __init__(self):
+        self._redis = None
+        if REDIS_AVAILABLE and REDIS_URL:
+            self._redis = redis.from_url(REDIS_URL)
+        # key -> (expires_at, value) when Redis isn't configured
+        self._local = {}
+
+    async def get(self, key):
+        if self._redis is not None:
+            try:
+                raw = await self._redis.get(key)
+                return orjson.loads(raw) if raw is not None else None
+            except Exception as e:
+                logger.warning(f"Redis get failed for {key}: {e}")
+                return None
+        entry = self._local.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return entry[1]
+
+    async def set(self, key, value, ttl=DEFAULT_TTL):
+        if self._redis is not None:
+            try:
+                await self._redis.setex(key, ttl, orjson.dumps(value))
+            except Exception as e:
+                logger.warning(f"Redis set failed for {key}: {e}")
+            return
+        self._local[key] = (time.monotonic() + ttl, value)
+
+# create global cache instance to import
+response_cache = ResponseCache()
@@ -1,4 +1,5 @@
 # app/core/config.py
+import functools
 import os
 from typing import Optional
 
@@ -7,6 +8,9 @@ class Settings:
     
     # Database configuration
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./pharma.db")
+    # Create/upgrade tables on startup; set CREATE_TABLES=0 on multi-worker
+    # deployments and run the schema setup once at deploy time instead
+    CREATE_TABLES: bool = os.getenv("CREATE_TABLES", "1") == "1"
     
     # Raspberry Pi configuration
     RASPBERRY_PI_MODE: bool = False
@@ -88,36 +92,43 @@ class Settings:
     
     def detect_raspberry_pi(self):
         """Detect if running on Raspberry Pi"""
-        try:
-            # Method 1: Check device tree model
-            if os.path.exists('/proc/device-tree/model'):
-                with open('/proc/device-tree/model', 'rb') as f:
-                    model = f.read().decode('utf-8', errors='ignore').strip('\x00')
-                    if 'Raspberry Pi' in model:
-                        self.RASPBERRY_PI_MODE = True
-                        return
-            
-            # Method 2: Check /proc/cpuinfo for Pi-specific hardware
-            if os.path.exists('/proc/cpuinfo'):
-                with open('/proc/cpuinfo', 'r') as f:
-                    cpuinfo = f.read().lower()
-                    # Look for Raspberry Pi specific identifiers
-                    pi_identifiers = ['bcm2', 'raspberry', 'arm']
-                    if any(identifier in cpuinfo for identifier in pi_identifiers):
-                        self.RASPBERRY_PI_MODE = True
-                        return
-            
-            # Method 3: Check for Pi-specific directories
-            pi_dirs = ['/sys/firmware/devicetree/base', '/opt/vc']
-            if any(os.path.exists(d) for d in pi_dirs):
-                self.RASPBERRY_PI_MODE = True
-                return
-                        
-        except Exception as e:
-            print(f"Pi detection error: {e}")
-            pass
+        self.RASPBERRY_PI_MODE = _detect_pi()
+
+@functools.lru_cache(maxsize=1)
+def _detect_pi() -> bool:
+    """Probe the hardware once per process; the answer never changes"""
+    try:
+        # Method 1: Check device tree model
+        if os.path.exists('/proc/device-tree/model'):
+            with open('/proc/device-tree/model', 'rb') as f:
+                model = f.read().decode('utf-8', errors='ignore').strip('\x00')
+                if 'Raspberry Pi' in model:
+                    return True
+        
+        # Method 2: Check /proc/cpuinfo for Pi-specific hardware
+        if os.path.exists('/proc/cpuinfo'):
+            with open('/proc/cpuinfo', 'r') as f:
+                # The identifiers appear in the first processor block
+                cpuinfo = f.read(1024).lower()
+                # Look for Raspberry Pi specific identifiers
+                pi_identifiers = ['bcm2', 'raspberry', 'arm']
+                if any(identifier in cpuinfo for identifier in pi_identifiers):
+                    return True
         
-        self.RASPBERRY_PI_MODE = False
+        # Method 3: Check for Pi-specific directories
+        pi_dirs = ['/sys/firmware/devicetree/base', '/opt/vc']
+        if any(os.path.exists(d) for d in pi_dirs):
+            return True
+                    
+    except Exception as e:
+        print(f"Pi detection error: {e}")
+        pass
+    
+    return False
+
+# Shift number (1=day, 2=evening, 3=night) indexed by local hour of day,
+# precomputed from MACHINE_CONFIG["shift_hours"]
+SHIFT_BY_HOUR = bytes([3] * 6 + [1] * 8 + [2] * 8 + [3] * 2)
 
 # Create global settings instance
 settings = Settings()
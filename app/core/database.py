@@ -1,18 +1,32 @@
 # app/core/database.py
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
 
-# Create engine
+# Create engine (pooled; sessions are per request / per call, never shared)
 engine = create_engine(
     settings.DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {}
+    connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {},
+    pool_pre_ping=True,
+    # QueuePool sizing for server databases; SQLite file connections are cheap
+    **({} if "sqlite" in settings.DATABASE_URL else {"pool_size": 20, "max_overflow": 40})
 )
 
 # Create session
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine for the API routes: same database through a non-blocking driver
+# (aiosqlite for SQLite, asyncpg for PostgreSQL)
+ASYNC_DATABASE_URL = (
+    settings.DATABASE_URL
+    .replace("sqlite://", "sqlite+aiosqlite://", 1)
+    .replace("postgresql://", "postgresql+asyncpg://", 1)
+)
+async_engine = create_async_engine(ASYNC_DATABASE_URL)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
 # Base class for models
 Base = declarative_base()
 
@@ -23,3 +37,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# Async dependency for DB session (used in async routes)
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,45 +1,95 @@
 # app/core/ws_manager.py
-from typing import List
+from typing import Dict, Set
 from fastapi import WebSocket
-import json
 import asyncio
+import logging
+import orjson
+
+logger = logging.getLogger(__name__)
+
+# Messages buffered per client before it is considered too slow and dropped
+SEND_QUEUE_SIZE = 32
 
 class ConnectionManager:
     def __init__(self):
-        self.active_connections: List[WebSocket] = []
-        # Lock to protect connection list in concurrency
+        self.active_connections: Set[WebSocket] = set()
+        # Each client gets a bounded outbox drained by its own writer task, so a
+        # slow client only ever delays itself
+        self._send_queues: Dict[WebSocket, asyncio.Queue] = {}
+        self._writers: Dict[WebSocket, asyncio.Task] = {}
+        # Lock to protect connection set in concurrency
         self._lock = asyncio.Lock()
 
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
+        queue = asyncio.Queue(maxsize=SEND_QUEUE_SIZE)
         async with self._lock:
-            self.active_connections.append(websocket)
+            self.active_connections.add(websocket)
+            self._send_queues[websocket] = queue
+            self._writers[websocket] = asyncio.create_task(self._writer(websocket, queue))
 
     async def disconnect(self, websocket: WebSocket):
         async with self._lock:
-            if websocket in self.active_connections:
-                self.active_connections.remove(websocket)
+            self.active_connections.discard(websocket)
+            self._send_queues.pop(websocket, None)
+            writer = self._writers.pop(websocket, None)
+        if writer is not None and writer is not asyncio.current_task():
+            writer.cancel()
+
+    async def _writer(self, websocket: WebSocket, queue: asyncio.Queue):
+        """Send queued messages to one client until it fails or disconnects"""
+        try:
+            while True:
+                data = await queue.get()
+                # Pre-encoded str goes out as a text frame, bytes as binary
+                if isinstance(data, str):
+                    await websocket.send_text(data)
+                else:
+                    await websocket.send_bytes(data)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # If send fails, drop the connection
+            await self.disconnect(websocket)
 
     async def broadcast(self, message: dict):
         """
-        Broadcast a dictionary message to all connected clients as JSON.
+        Broadcast a dictionary message to all connected clients as JSON bytes.
+
+        The message is encoded once and queued for every client; this returns
+        without waiting for any socket write.
         """
         if not self.active_connections:
             return
-        text = json.dumps(message, default=str)
-        async with self._lock:
-            to_remove = []
-            for ws in self.active_connections:
-                try:
-                    await ws.send_text(text)
-                except Exception:
-                    # If send fails, schedule removal
-                    to_remove.append(ws)
-            for ws in to_remove:
-                try:
-                    self.active_connections.remove(ws)
-                except ValueError:
-                    pass
+        await self.broadcast_raw(orjson.dumps(message, default=str, option=orjson.OPT_NAIVE_UTC))
+
+    async def broadcast_raw(self, data):
+        """Queue an already encoded frame (str for text, bytes for binary) for every client"""
+        too_slow = [ws for ws, queue in list(self._send_queues.items()) if not self._enqueue(queue, data)]
+        for ws in too_slow:
+            await self._drop_slow(ws)
+
+    async def send_raw(self, websocket: WebSocket, data):
+        """Queue an already encoded frame for one client, in order with broadcasts"""
+        queue = self._send_queues.get(websocket)
+        if queue is not None and not self._enqueue(queue, data):
+            await self._drop_slow(websocket)
+
+    @staticmethod
+    def _enqueue(queue: asyncio.Queue, data) -> bool:
+        try:
+            queue.put_nowait(data)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    async def _drop_slow(self, websocket: WebSocket):
+        logger.warning("Dropping WebSocket client that fell too far behind")
+        await self.disconnect(websocket)
+        try:
+            await websocket.close()
+        except Exception:
+            pass
 
 # create global manager instance to import
 ws_manager = ConnectionManager()
@@ -0,0 +1,72 @@
+# app/ml/batcher.py
+import asyncio
+import logging
+import numpy as np
+from app.ml.model import predict_downtime_batch
+
+logger = logging.getLogger(__name__)
+
+class PredictionBatcher:
+    """Coalesce concurrent single-row predictions into one model call.
+
+    Rows queued within max_wait_ms of the first (up to max_batch) are stacked
+    and scored by a single predict_downtime_batch call in a worker thread.
+    """
+
+    def __init__(self, max_batch=64, max_wait_ms=20):
+        self.max_batch = max_batch
+        self.max_wait_ms = max_wait_ms
+        # Pending (features, future) pairs; created on the serving event loop
+        self._queue = None
+        self._task = None
+        self._loop = None
+
+    def start(self):
+        """Start the drain task on the running event loop"""
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def predict(self, features):
+        """Downtime probability for one (6,) feature row"""
+        # Started lazily (or restarted if the serving loop changed)
+        if self._task is None or self._task.done() or self._loop is not asyncio.get_running_loop():
+            self.start()
+        fut = self._loop.create_future()
+        await self._queue.put((features, fut))
+        return await fut
+
+    async def _run(self):
+        """Drain queued rows in batches and resolve each row's future"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait_ms / 1000
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                X = np.vstack([features for features, _ in batch])
+                # Keep the model off the event loop
+                probabilities = await asyncio.to_thread(predict_downtime_batch, X)
+            except Exception as e:
+                logger.error(f"Batch prediction failed: {e}")
+                for _, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+                continue
+
+            for (_, fut), probability in zip(batch, probabilities):
+                if not fut.done():
+                    fut.set_result(float(probability))
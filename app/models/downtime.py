@@ -1,6 +1,13 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Float, Boolean, Index, Enum
 from app.core.database import Base
 from datetime import datetime
+import enum
+
+class SensorStatus(str, enum.Enum):
+    """Equipment status derived from the risk score"""
+    OK = "OK"
+    WARNING = "WARNING"
+    CRITICAL = "CRITICAL"
 
 class Downtime(Base):
     __tablename__ = "downtime_events"
@@ -11,6 +18,16 @@ class Downtime(Base):
     duration_minutes = Column(Float)  # Duration in minutes
     timestamp = Column(DateTime, default=datetime.utcnow)  # Event time
 
+    # Append-only time series: BRIN on PostgreSQL, plain index elsewhere.
+    # Per-machine history reads newest-first straight off the composite index;
+    # INCLUDE makes it index-only on PostgreSQL
+    __table_args__ = (
+        Index("idx_downtime_ts_brin", "timestamp",
+              postgresql_using="brin", postgresql_with={"pages_per_range": 128}),
+        Index("ix_dt_mid_ts", machine_id, timestamp.desc(),
+              postgresql_include=["reason", "duration_minutes"]),
+    )
+
 class SensorReading(Base):
     __tablename__ = "sensor_readings"
     
@@ -31,7 +48,8 @@ class SensorReading(Base):
     
     # Risk assessment
     risk_score = Column(Float)
-    status = Column(String)  # OK, WARNING, CRITICAL
+    # Native ENUM on PostgreSQL (4 bytes, integer compares); VARCHAR on SQLite
+    status = Column(Enum(SensorStatus, name="sensor_status", create_constraint=False))
     
     # ML predictions
     ml_downtime_probability = Column(Float)
@@ -40,3 +58,25 @@ class SensorReading(Base):
     # Sensor status
     raspberry_pi_mode = Column(Boolean, default=False)
     sensor_mode = Column(String)  # 'online', 'offline', 'simulated'
+
+    # Append-only time series: BRIN on PostgreSQL, plain index elsewhere.
+    # Per-machine history reads newest-first straight off the composite index;
+    # INCLUDE makes the dashboard's status/risk lookups index-only on PostgreSQL
+    __table_args__ = (
+        Index("idx_sensor_ts_brin", "timestamp",
+              postgresql_using="brin", postgresql_with={"pages_per_range": 128}),
+        Index("ix_sr_mid_ts", machine_id, timestamp.desc(),
+              postgresql_include=["status", "risk_score", "ml_downtime_probability"]),
+    )
+
+class SensorStatusCount(Base):
+    """Rollup of sensor_readings: reading count per machine and status.
+
+    Maintained alongside every insert so dashboard stats read a handful of
+    rows instead of scanning the whole time series.
+    """
+    __tablename__ = "sensor_status_counts"
+    
+    machine_id = Column(String, primary_key=True)
+    status = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
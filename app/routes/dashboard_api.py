@@ -1,21 +1,47 @@
 # app/routes/dashboard_api.py
-from fastapi import APIRouter
-from app.services.database_service import db_service
-from typing import List, Dict, Any
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.cache import response_cache
+from app.core.database import get_async_db
+from app.models.downtime import SensorReading
+from app.schemas.dashboard_schema import (
+    DashboardStatsResponse,
+    SensorHistoryResponse,
+    DowntimeHistoryResponse,
+    MachinesResponse,
+)
+from app.services.database_service import (
+    recent_readings_query,
+    latest_reading_per_machine_query,
+    downtime_events_query,
+    status_counts_query,
+    downtime_count_query,
+    dashboard_stats_from_counts,
+)
+from typing import Any
 import logging
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-@router.get("/api/dashboard/stats")
-def get_dashboard_stats() -> Dict[str, Any]:
+@router.get("/api/dashboard/stats", response_model=DashboardStatsResponse, response_model_exclude_unset=True)
+async def get_dashboard_stats(db: AsyncSession = Depends(get_async_db)) -> Any:
     """Get dashboard statistics from database"""
     try:
-        stats = db_service.get_dashboard_stats()
-        return {
+        cached = await response_cache.get("stats:v1")
+        if cached is not None:
+            return cached
+        
+        stats = dashboard_stats_from_counts(
+            (await db.execute(status_counts_query())).all(),
+            await db.scalar(downtime_count_query())
+        )
+        response = {
             "status": "success",
             "data": stats
         }
+        await response_cache.set("stats:v1", response)
+        return response
     except Exception as e:
         logger.error(f"Dashboard stats API error: {e}")
         return {
@@ -28,39 +54,43 @@ def get_dashboard_stats() -> Dict[str, Any]:
             }
         }
 
-@router.get("/api/sensor/history")
-def get_sensor_history(machine_id: str = None, limit: int = 100) -> Dict[str, Any]:
+# Columns returned by /api/sensor/history, selected directly instead of loading ORM objects
+SENSOR_HISTORY_COLUMNS = (
+    SensorReading.id,
+    SensorReading.machine_id,
+    SensorReading.timestamp,
+    SensorReading.ambient_temperature,
+    SensorReading.machine_temperature,
+    SensorReading.humidity,
+    SensorReading.vibration,
+    SensorReading.current,
+    SensorReading.load,
+    SensorReading.shift,
+    SensorReading.risk_score,
+    SensorReading.status,
+    SensorReading.ml_downtime_probability,
+    SensorReading.ml_predicted_downtime,
+    SensorReading.raspberry_pi_mode,
+    SensorReading.sensor_mode,
+)
+
+@router.get("/api/sensor/history", response_model=SensorHistoryResponse, response_model_exclude_unset=True)
+async def get_sensor_history(
+    machine_id: str = None,
+    limit: int = 100,
+    db: AsyncSession = Depends(get_async_db)
+) -> Any:
     """Get historical sensor readings"""
     try:
-        readings = db_service.get_recent_readings(machine_id, limit)
-        
-        # Convert to JSON-serializable format
-        data = []
-        for reading in readings:
-            data.append({
-                "id": reading.id,
-                "machine_id": reading.machine_id,
-                "timestamp": reading.timestamp.isoformat(),
-                "ambient_temperature": reading.ambient_temperature,
-                "machine_temperature": reading.machine_temperature,
-                "humidity": reading.humidity,
-                "vibration": reading.vibration,
-                "current": reading.current,
-                "load": reading.load,
-                "shift": reading.shift,
-                "risk_score": reading.risk_score,
-                "status": reading.status,
-                "ml_downtime_probability": reading.ml_downtime_probability,
-                "ml_predicted_downtime": reading.ml_predicted_downtime,
-                "raspberry_pi_mode": reading.raspberry_pi_mode,
-                "sensor_mode": reading.sensor_mode
-            })
+        result = await db.execute(recent_readings_query(machine_id, limit, SENSOR_HISTORY_COLUMNS))
+        data = result.all()
         
-        return {
-            "status": "success",
-            "count": len(data),
-            "data": data
-        }
+        # Rows are read by attribute and serialized by pydantic-core
+        return SensorHistoryResponse(
+            status="success",
+            count=len(data),
+            data=data
+        )
         
     except Exception as e:
         logger.error(f"Sensor history API error: {e}")
@@ -70,28 +100,21 @@ def get_sensor_history(machine_id: str = None, limit: int = 100) -> Dict[str, An
             "data": []
         }
 
-@router.get("/api/downtime/history")
-def get_downtime_history(machine_id: str = None, limit: int = 50) -> Dict[str, Any]:
+@router.get("/api/downtime/history", response_model=DowntimeHistoryResponse, response_model_exclude_unset=True)
+async def get_downtime_history(
+    machine_id: str = None,
+    limit: int = 50,
+    db: AsyncSession = Depends(get_async_db)
+) -> Any:
     """Get historical downtime events"""
     try:
-        events = db_service.get_downtime_events(machine_id, limit)
+        events = (await db.scalars(downtime_events_query(machine_id, limit))).all()
         
-        # Convert to JSON-serializable format
-        data = []
-        for event in events:
-            data.append({
-                "id": event.id,
-                "machine_id": event.machine_id,
-                "reason": event.reason,
-                "duration_minutes": event.duration_minutes,
-                "timestamp": event.timestamp.isoformat()
-            })
-        
-        return {
-            "status": "success",
-            "count": len(data),
-            "data": data
-        }
+        return DowntimeHistoryResponse(
+            status="success",
+            count=len(events),
+            data=events
+        )
         
     except Exception as e:
         logger.error(f"Downtime history API error: {e}")
@@ -101,34 +124,24 @@ def get_downtime_history(machine_id: str = None, limit: int = 50) -> Dict[str, A
             "data": []
         }
 
-@router.get("/api/machines")
-def get_machines() -> Dict[str, Any]:
+@router.get("/api/machines", response_model=MachinesResponse, response_model_exclude_unset=True)
+async def get_machines(db: AsyncSession = Depends(get_async_db)) -> Any:
     """Get list of all machines"""
     try:
-        # Get unique machine IDs from sensor readings
-        readings = db_service.get_recent_readings(limit=1000)
-        machine_ids = list(set([r.machine_id for r in readings]))
+        cached = await response_cache.get("machines:v1")
+        if cached is not None:
+            return cached
         
-        machines = []
-        for machine_id in machine_ids:
-            # Get latest reading for each machine
-            latest_readings = db_service.get_recent_readings(machine_id, 1)
-            if latest_readings:
-                latest = latest_readings[0]
-                machines.append({
-                    "machine_id": machine_id,
-                    "status": latest.status,
-                    "risk_score": latest.risk_score,
-                    "last_reading": latest.timestamp.isoformat(),
-                    "raspberry_pi_mode": latest.raspberry_pi_mode,
-                    "sensor_mode": latest.sensor_mode
-                })
+        latest_readings = (await db.scalars(latest_reading_per_machine_query())).all()
         
-        return {
-            "status": "success",
-            "count": len(machines),
-            "data": machines
-        }
+        # Latest reading for each machine
+        response = MachinesResponse(
+            status="success",
+            count=len(latest_readings),
+            data=latest_readings
+        )
+        await response_cache.set("machines:v1", response.model_dump(mode="json", exclude_unset=True))
+        return response
         
     except Exception as e:
         logger.error(f"Machines API error: {e}")
@@ -1,29 +1,24 @@
 # app/routes/downtime_routes.py
-from fastapi import APIRouter
 
-router = APIRouter(prefix="/downtime", tags=["Downtime"])
-
-@router.get("/test")
-def test():
-    return {"status": "Downtime route working!"}
-# app/routes/downtime_routes.py
-
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.core.database import get_db
+from app.core.database import get_db, get_async_db
 from app.schemas.downtime_schema import DowntimeCreate, DowntimeResponse
 from app.services.downtime_service import create_downtime, get_all_downtimes, get_downtime_prediction
-from typing import List
+from typing import List, Optional
 
 router = APIRouter(prefix="/downtime", tags=["Downtime"])
 
 @router.post("/", response_model=DowntimeResponse)
-def log_downtime(downtime: DowntimeCreate, db: Session = Depends(get_db)):
-    return create_downtime(db, downtime)
+async def log_downtime(downtime: DowntimeCreate, db: AsyncSession = Depends(get_async_db)):
+    return await create_downtime(db, downtime)
 
 @router.get("/", response_model=List[DowntimeResponse])
-def fetch_downtimes(db: Session = Depends(get_db)):
-    return get_all_downtimes(db)
+async def fetch_downtimes(db: AsyncSession = Depends(get_async_db)):
+    # Returning a response directly bypasses FastAPI's response_model re-validation
+    return ORJSONResponse([d.model_dump() for d in await get_all_downtimes(db)])
 
 from fastapi import Query
 
@@ -39,34 +34,45 @@ def predict_downtime(
 from app.utils.report_generator import generate_downtime_report
 
 @router.get("/report")
-def downtime_report(db: Session = Depends(get_db)):
-    return generate_downtime_report(db)
+def downtime_report(if_none_match: Optional[str] = Header(None), db: Session = Depends(get_db)):
+    return generate_downtime_report(db, if_none_match)
 
 from app.utils.pdf_generator import generate_downtime_pdf
 from app.utils.email_sender import send_email_with_pdf
-import tempfile
-import os
+from app.core.database import SessionLocal
+import logging
 
-from fastapi import Request
+from fastapi import BackgroundTasks, Request
 from fastapi.responses import StreamingResponse, JSONResponse
 import io
 
+logger = logging.getLogger(__name__)
+
+def _generate_and_send(receiver_email: str):
+    """Build the PDF and email it, outside the request/response cycle"""
+    with SessionLocal() as db:
+        pdf_bytes = generate_downtime_pdf(db)
+    if pdf_bytes is None:
+        logger.warning(f"No downtime events - report not sent to {receiver_email}")
+        return
+    try:
+        send_email_with_pdf(receiver_email, pdf_bytes)
+        logger.info(f"Downtime report sent to {receiver_email}")
+    except Exception as e:
+        logger.error(f"Sending downtime report to {receiver_email} failed: {e}")
+
 @router.post("/pdf-or-send-report")
-async def pdf_or_send_report(request: Request, db: Session = Depends(get_db)):
+async def pdf_or_send_report(request: Request, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
     try:
         data = await request.json()
     except Exception:
         data = {}
     receiver_email = data.get("receiver_email") if isinstance(data, dict) else None
+    if receiver_email:
+        # SMTP can take seconds; answer now and send after the response
+        background_tasks.add_task(_generate_and_send, receiver_email)
+        return JSONResponse(content={"status": "queued", "receiver_email": receiver_email}, status_code=202)
     pdf_bytes = generate_downtime_pdf(db)
     if pdf_bytes is None:
         return JSONResponse(content={"error": "No downtime events to generate PDF"}, status_code=404)
-    if receiver_email:
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
-        with open(temp_file.name, "wb") as f:
-            f.write(pdf_bytes)
-        result = send_email_with_pdf(receiver_email, temp_file.name)
-        os.remove(temp_file.name)
-        return JSONResponse(content={"status": "sent", "detail": result})
-    else:
-        return StreamingResponse(io.BytesIO(pdf_bytes), media_type="application/pdf", headers={"Content-Disposition": "attachment; filename=downtime_report.pdf"})
+    return StreamingResponse(io.BytesIO(pdf_bytes), media_type="application/pdf", headers={"Content-Disposition": "attachment; filename=downtime_report.pdf"})
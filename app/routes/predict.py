@@ -1,15 +1,21 @@
 # app/routes/predict.py
 from fastapi import APIRouter, HTTPException
-from app.ml.model import predict_downtime
-from typing import Dict, Any
+from app.ml.batcher import PredictionBatcher
+from app.ml.model import predict_downtime, predict_downtime_batch, risk_level
+from app.schemas.predict_schema import PredictFeatures
+from typing import Dict, Any, List
+import asyncio
 import logging
-import pandas as pd
+import numpy as np
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# Concurrent /predict calls arriving within 5 ms share one model call
+batcher = PredictionBatcher(max_batch=64, max_wait_ms=5)
+
 @router.get("/predict")
-def predict_downtime_api(
+async def predict_downtime_api(
     ambient_temp: float, 
     machine_temp: float, 
     humidity: float, 
@@ -29,8 +35,17 @@ def predict_downtime_api(
     - shift: Shift number (1=day, 2=evening, 3=night)
     """
     try:
-        # Use the enhanced ML model
-        result = predict_downtime(ambient_temp, machine_temp, humidity, vibration, current, shift)
+        # Use the enhanced ML model, batched with any concurrent requests
+        features = np.array(
+            [ambient_temp, machine_temp, humidity, vibration, current, shift],
+            dtype=np.float32
+        )
+        downtime_prob = await batcher.predict(features)
+        result = {
+            'downtime_predicted': downtime_prob > 0.5,
+            'downtime_probability': round(downtime_prob, 3),
+            'risk_level': risk_level(downtime_prob)
+        }
         
         # Add input parameters to response
         response = {
@@ -53,6 +68,39 @@ def predict_downtime_api(
         logger.error(f"Prediction API error: {e}")
         raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
 
+# Largest batch accepted by /predict_batch in one request
+MAX_PREDICT_BATCH = 1000
+
+@router.post("/predict_batch")
+async def predict_downtime_batch_api(readings: List[PredictFeatures]) -> Dict[str, Any]:
+    """Predict downtime for several readings with one pass over the model"""
+    if len(readings) > MAX_PREDICT_BATCH:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_PREDICT_BATCH} readings per batch")
+    if not readings:
+        return {"predictions": [], "model_version": "enhanced_pharma_v2.0"}
+    
+    try:
+        X = np.array(
+            [(r.ambient_temp, r.machine_temp, r.humidity, r.vibration, r.current, r.shift) for r in readings],
+            dtype=np.float32
+        )
+        probabilities = await asyncio.to_thread(predict_downtime_batch, X)
+        
+        predictions = [
+            {
+                'downtime_predicted': bool(p > 0.5),
+                'downtime_probability': round(float(p), 3),
+                'risk_level': risk_level(p)
+            }
+            for p in probabilities
+        ]
+        logger.info(f"Batch prediction: {len(predictions)} readings")
+        return {"predictions": predictions, "model_version": "enhanced_pharma_v2.0"}
+        
+    except Exception as e:
+        logger.error(f"Batch prediction API error: {e}")
+        raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
+
 # Legacy endpoint for backward compatibility
 @router.get("/predict/legacy")
 def predict_downtime_legacy_api(
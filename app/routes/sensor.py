@@ -1,15 +1,33 @@
 # app/routes/sensor.py (excerpt)
 
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from app.core.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_async_db
 from app.models.downtime import Downtime
-from app.ml.model import predict_downtime  # your predict function
+from app.ml.batcher import PredictionBatcher
 from app.core.ws_manager import ws_manager
 from datetime import datetime
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Micro-batching: readings arriving within 20 ms share one predict_proba call
+batcher = PredictionBatcher(max_batch=64, max_wait_ms=20)
 
 router = APIRouter()
 
+
+@router.on_event("startup")
+async def start_batch_predictor():
+    batcher.start()
+
+
+@router.on_event("shutdown")
+async def stop_batch_predictor():
+    batcher.stop()
+
+
 @router.post("/sensor-data/")
 async def receive_sensor_data(
     machine_id: str,
@@ -17,22 +35,30 @@ async def receive_sensor_data(
     vibration_level: float,
     humidity: float,
     shift_time: int,
-    db: Session = Depends(get_db)
+    ambient_temp: float = 23.0,  # Typical cleanroom ambient when not reported
+    current: float = 3.5,        # Typical running current when not reported
+    db: AsyncSession = Depends(get_async_db)
 ):
-    # Only pass the features your model expects
-    probability = predict_downtime(machine_temperature, vibration_level, humidity, shift_time)  # returns 0 or 1
+    # Same column order as the model in app/ml/model.py
+    features = np.array(
+        [ambient_temp, machine_temperature, humidity, vibration_level, current, shift_time],
+        dtype=np.float64,
+    )
+    probability = await batcher.predict(features)
+
+    # One clock read for both the row and the broadcast
+    now = datetime.utcnow()
 
     # Save to DB
     event = Downtime(
         machine_id=machine_id,
         reason="sensor_reading",
         duration_minutes=0.0,
-        timestamp=datetime.utcnow(),
+        timestamp=now,
         # optionally include sensor fields in your model or use metadata table
     )
     db.add(event)
-    db.commit()
-    db.refresh(event)
+    await db.commit()
 
     # Build broadcast payload
     payload = {
@@ -43,7 +69,7 @@ async def receive_sensor_data(
         "humidity": humidity,
         "shift": shift_time,
         "downtime_probability": round(float(probability), 3),
-        "timestamp": datetime.utcnow().isoformat()
+        "timestamp": now  # ws_manager's orjson encoder writes it as ISO 8601 UTC
     }
 
     # Broadcast to all connected websocket clients
@@ -0,0 +1,72 @@
+from pydantic import AliasChoices, BaseModel, ConfigDict, Field
+from datetime import datetime
+from typing import List, Optional
+from app.models.downtime import SensorStatus
+from app.schemas.downtime_schema import DowntimeResponse
+
+# Schema for one row of /api/sensor/history
+class SensorReadingOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    machine_id: str
+    timestamp: datetime
+    ambient_temperature: Optional[float] = None
+    machine_temperature: Optional[float] = None
+    humidity: Optional[float] = None
+    vibration: Optional[float] = None
+    current: Optional[float] = None
+    load: Optional[float] = None
+    shift: Optional[int] = None
+    risk_score: Optional[float] = None
+    status: Optional[SensorStatus] = None
+    ml_downtime_probability: Optional[float] = None
+    ml_predicted_downtime: Optional[bool] = None
+    raspberry_pi_mode: Optional[bool] = None
+    sensor_mode: Optional[str] = None
+
+# Schema for one machine in /api/machines (built from its latest reading)
+class MachineOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    machine_id: str
+    status: Optional[SensorStatus] = None
+    risk_score: Optional[float] = None
+    last_reading: datetime = Field(validation_alias=AliasChoices("timestamp", "last_reading"))
+    raspberry_pi_mode: Optional[bool] = None
+    sensor_mode: Optional[str] = None
+
+class RiskDistribution(BaseModel):
+    critical: int
+    warning: int
+    ok: int
+
+class DashboardStats(BaseModel):
+    total_readings: int
+    total_downtime_events: int
+    risk_distribution: RiskDistribution
+
+# Response envelopes; "count" is left unset on errors and "message" on success,
+# so routes use response_model_exclude_unset to keep the original JSON shape
+class DashboardStatsResponse(BaseModel):
+    status: str
+    message: Optional[str] = None
+    data: DashboardStats
+
+class SensorHistoryResponse(BaseModel):
+    status: str
+    count: Optional[int] = None
+    message: Optional[str] = None
+    data: List[SensorReadingOut]
+
+class DowntimeHistoryResponse(BaseModel):
+    status: str
+    count: Optional[int] = None
+    message: Optional[str] = None
+    data: List[DowntimeResponse]
+
+class MachinesResponse(BaseModel):
+    status: str
+    count: Optional[int] = None
+    message: Optional[str] = None
+    data: List[MachineOut]
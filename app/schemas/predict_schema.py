@@ -0,0 +1,10 @@
+from pydantic import BaseModel
+
+# Schema for one feature row sent to /predict_batch (same inputs as /predict)
+class PredictFeatures(BaseModel):
+    ambient_temp: float
+    machine_temp: float
+    humidity: float
+    vibration: float
+    current: float
+    shift: int
@@ -1,52 +1,136 @@
 # app/services/database_service.py
-from sqlalchemy.orm import Session
+from sqlalchemy import Integer, cast, func, insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import aliased
+from app.core.config import SHIFT_BY_HOUR
 from app.core.database import SessionLocal, engine
-from app.models.downtime import Base, SensorReading, Downtime
+from app.models.downtime import Base, SensorReading, SensorStatusCount, Downtime
+from app.ml.model import predict_downtime
+from collections import Counter
 from datetime import datetime
+import asyncio
 import logging
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+# Sensor readings are buffered and written in one executemany per flush:
+# every SENSOR_FLUSH_INTERVAL seconds, or as soon as SENSOR_FLUSH_ROWS are waiting
+SENSOR_FLUSH_INTERVAL = 0.1
+SENSOR_FLUSH_ROWS = 500
 
-class DatabaseService:
-    def __init__(self):
-        self.db: Session = None
+def init_db():
+    """Create tables and indexes and seed the status rollup.
+
+    One-shot schema setup, run from the app's startup (see CREATE_TABLES in
+    settings) rather than at import, so importing this module does no DB I/O.
+    """
+    Base.metadata.create_all(bind=engine)
     
-    def get_db_session(self):
-        """Get database session"""
-        if not self.db:
-            self.db = SessionLocal()
-        return self.db
+    # create_all skips indexes on tables that already exist, so add the
+    # timestamp indexes to older databases explicitly
+    for table in (SensorReading.__table__, Downtime.__table__):
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
     
-    def close_db_session(self):
-        """Close database session"""
-        if self.db:
-            self.db.close()
-            self.db = None
+    # Seed the status rollup from existing readings the first time it is created
+    with SessionLocal() as db:
+        if db.scalar(select(func.count()).select_from(SensorStatusCount)) == 0:
+            db.execute(insert(SensorStatusCount).from_select(
+                ["machine_id", "status", "count"],
+                select(SensorReading.machine_id, SensorReading.status, func.count())
+                .where(SensorReading.machine_id.is_not(None), SensorReading.status.is_not(None))
+                .group_by(SensorReading.machine_id, SensorReading.status)
+            ))
+            db.commit()
+
+# Query builders shared by the sync service below and the async API routes
+def recent_readings_query(machine_id=None, limit=100, columns=None):
+    """Newest sensor readings first, optionally for one machine.
+
+    Pass columns to select plain rows instead of SensorReading objects.
+    """
+    stmt = select(*columns) if columns else select(SensorReading)
+    if machine_id:
+        stmt = stmt.where(SensorReading.machine_id == machine_id)
+    return stmt.order_by(SensorReading.timestamp.desc()).limit(limit)
+
+def latest_reading_per_machine_query():
+    """Most recent sensor reading for every machine"""
+    # Rank each machine's readings newest-first and keep rank 1
+    # (window function works on both SQLite and PostgreSQL)
+    ranked = select(
+        SensorReading,
+        func.row_number().over(
+            partition_by=SensorReading.machine_id,
+            order_by=SensorReading.timestamp.desc()
+        ).label("rn")
+    ).subquery()
+    latest = aliased(SensorReading, ranked)
+    return select(latest).where(ranked.c.rn == 1).order_by(latest.machine_id)
+
+def downtime_events_query(machine_id=None, limit=50):
+    """Newest downtime events first, optionally for one machine"""
+    stmt = select(Downtime)
+    if machine_id:
+        stmt = stmt.where(Downtime.machine_id == machine_id)
+    return stmt.order_by(Downtime.timestamp.desc()).limit(limit)
+
+def status_counts_query():
+    """Sensor reading count per status, read from the sensor_status_counts rollup"""
+    return select(
+        SensorStatusCount.status, cast(func.sum(SensorStatusCount.count), Integer)
+    ).group_by(SensorStatusCount.status)
+
+def increment_status_count_stmt(machine_id, status, n=1):
+    """Upsert that bumps the rollup row by n new readings"""
+    upsert = pg_insert if engine.dialect.name == "postgresql" else sqlite_insert
+    stmt = upsert(SensorStatusCount).values(machine_id=machine_id, status=status, count=n)
+    return stmt.on_conflict_do_update(
+        index_elements=[SensorStatusCount.machine_id, SensorStatusCount.status],
+        set_={"count": SensorStatusCount.count + n}
+    )
+
+def downtime_count_query():
+    return select(func.count(Downtime.id))
+
+def dashboard_stats_from_counts(status_counts, total_downtime):
+    """Shape the dashboard stats payload from status_counts_query rows"""
+    status_counts = dict(status_counts)
+    return {
+        # Every reading falls in exactly one status group
+        'total_readings': sum(status_counts.values()),
+        'total_downtime_events': total_downtime,
+        'risk_distribution': {
+            'critical': status_counts.get('CRITICAL', 0),
+            'warning': status_counts.get('WARNING', 0),
+            'ok': status_counts.get('OK', 0)
+        }
+    }
+
+class DatabaseService:
+    """Database access for the monitoring loop; each call uses its own pooled session"""
+    
+    def __init__(self):
+        # Sensor reading rows waiting for the next flush
+        self._pending_readings = []
+        self._pending_lock = threading.Lock()
     
     def save_sensor_reading(self, sensor_data, machine_id="Machine1"):
         """Save sensor reading to database"""
         try:
-            db = self.get_db_session()
-            
-            # Calculate shift
-            current_hour = datetime.now().hour
-            if 6 <= current_hour < 14:
-                shift = 1  # Day
-            elif 14 <= current_hour < 22:
-                shift = 2  # Evening
-            else:
-                shift = 3  # Night
+            # Calculate shift (table lookup on the plant's local hour)
+            shift = SHIFT_BY_HOUR[time.localtime().tm_hour]
             
             # Get risk assessment
             from main import sensor_manager
             risk_score = sensor_manager.calculate_downtime_risk()
             status = sensor_manager.get_status_from_risk(risk_score)
             
-            # Create sensor reading record
-            reading = SensorReading(
+            # Create sensor reading row
+            reading = dict(
                 machine_id=machine_id,
                 timestamp=datetime.utcnow(),
                 ambient_temperature=sensor_data["temperature"]["value"],
@@ -64,37 +148,66 @@ class DatabaseService:
             
             # Add ML predictions if available
             try:
-                from app.ml.model import predict_downtime
                 ml_result = predict_downtime(
-                    reading.ambient_temperature,
-                    reading.machine_temperature, 
-                    reading.humidity,
-                    reading.vibration,
-                    reading.current,
-                    reading.shift
+                    reading["ambient_temperature"],
+                    reading["machine_temperature"],
+                    reading["humidity"],
+                    reading["vibration"],
+                    reading["current"],
+                    reading["shift"]
                 )
-                reading.ml_downtime_probability = ml_result['downtime_probability']
-                reading.ml_predicted_downtime = ml_result['downtime_predicted']
+                reading["ml_downtime_probability"] = ml_result['downtime_probability']
+                reading["ml_predicted_downtime"] = ml_result['downtime_predicted']
             except Exception as e:
                 logger.warning(f"ML prediction for DB failed: {e}")
-                reading.ml_downtime_probability = 0.0
-                reading.ml_predicted_downtime = False
+                reading["ml_downtime_probability"] = 0.0
+                reading["ml_predicted_downtime"] = False
             
-            db.add(reading)
-            db.commit()
+            # Queued for the next bulk flush
+            with self._pending_lock:
+                self._pending_readings.append(reading)
+                flush_now = len(self._pending_readings) >= SENSOR_FLUSH_ROWS
+            if flush_now:
+                self.flush_sensor_readings()
             
-            logger.debug(f"💾 Saved sensor reading: {status} risk={risk_score:.3f}")
+            logger.debug(f"💾 Queued sensor reading: {status} risk={risk_score:.3f}")
             
         except Exception as e:
             logger.error(f"Database save error: {e}")
-            if self.db:
-                self.db.rollback()
+    
+    def flush_sensor_readings(self):
+        """Write all buffered sensor readings in one transaction"""
+        with self._pending_lock:
+            rows, self._pending_readings = self._pending_readings, []
+        if not rows:
+            return
+        
+        try:
+            with SessionLocal() as db:
+                db.execute(insert(SensorReading), rows)
+                # Same transaction as the readings, so the rollup never drifts
+                for (machine_id, status), n in Counter((r["machine_id"], r["status"]) for r in rows).items():
+                    db.execute(increment_status_count_stmt(machine_id, status, n))
+                db.commit()
+            
+            logger.debug(f"💾 Saved {len(rows)} sensor readings")
+            
+        except Exception as e:
+            logger.error(f"Database save error ({len(rows)} readings dropped): {e}")
+    
+    async def run_sensor_flusher(self):
+        """Background task: flush buffered readings every SENSOR_FLUSH_INTERVAL"""
+        try:
+            while True:
+                await asyncio.sleep(SENSOR_FLUSH_INTERVAL)
+                await asyncio.to_thread(self.flush_sensor_readings)
+        finally:
+            # Don't lose readings buffered since the last tick on shutdown
+            self.flush_sensor_readings()
     
     def save_downtime_event(self, machine_id, reason, duration_minutes=0.0):
         """Save downtime event to database"""
         try:
-            db = self.get_db_session()
-            
             downtime = Downtime(
                 machine_id=machine_id,
                 reason=reason,
@@ -102,27 +215,30 @@ class DatabaseService:
                 timestamp=datetime.utcnow()
             )
             
-            db.add(downtime)
-            db.commit()
+            with SessionLocal() as db:
+                db.add(downtime)
+                db.commit()
             
             logger.info(f"⚠️ Downtime event saved: {machine_id} - {reason}")
             
         except Exception as e:
             logger.error(f"Downtime save error: {e}")
-            if self.db:
-                self.db.rollback()
     
     def get_recent_readings(self, machine_id=None, limit=100):
         """Get recent sensor readings"""
         try:
-            db = self.get_db_session()
+            with SessionLocal() as db:
+                return db.scalars(recent_readings_query(machine_id, limit)).all()
             
-            query = db.query(SensorReading)
-            if machine_id:
-                query = query.filter(SensorReading.machine_id == machine_id)
-            
-            readings = query.order_by(SensorReading.timestamp.desc()).limit(limit).all()
-            return readings
+        except Exception as e:
+            logger.error(f"Database query error: {e}")
+            return []
+    
+    def get_latest_reading_per_machine(self):
+        """Get the most recent sensor reading for every machine in one query"""
+        try:
+            with SessionLocal() as db:
+                return db.scalars(latest_reading_per_machine_query()).all()
             
         except Exception as e:
             logger.error(f"Database query error: {e}")
@@ -131,14 +247,8 @@ class DatabaseService:
     def get_downtime_events(self, machine_id=None, limit=50):
         """Get recent downtime events"""
         try:
-            db = self.get_db_session()
-            
-            query = db.query(Downtime)
-            if machine_id:
-                query = query.filter(Downtime.machine_id == machine_id)
-            
-            events = query.order_by(Downtime.timestamp.desc()).limit(limit).all()
-            return events
+            with SessionLocal() as db:
+                return db.scalars(downtime_events_query(machine_id, limit)).all()
             
         except Exception as e:
             logger.error(f"Database query error: {e}")
@@ -147,28 +257,11 @@ class DatabaseService:
     def get_dashboard_stats(self):
         """Get dashboard statistics"""
         try:
-            db = self.get_db_session()
-            
-            # Recent readings count
-            total_readings = db.query(SensorReading).count()
-            
-            # Recent downtime events
-            total_downtime = db.query(Downtime).count()
-            
-            # Risk distribution
-            critical_count = db.query(SensorReading).filter(SensorReading.status == 'CRITICAL').count()
-            warning_count = db.query(SensorReading).filter(SensorReading.status == 'WARNING').count()
-            ok_count = db.query(SensorReading).filter(SensorReading.status == 'OK').count()
-            
-            return {
-                'total_readings': total_readings,
-                'total_downtime_events': total_downtime,
-                'risk_distribution': {
-                    'critical': critical_count,
-                    'warning': warning_count,
-                    'ok': ok_count
-                }
-            }
+            with SessionLocal() as db:
+                return dashboard_stats_from_counts(
+                    db.execute(status_counts_query()).all(),
+                    db.scalar(downtime_count_query())
+                )
             
         except Exception as e:
             logger.error(f"Dashboard stats error: {e}")
@@ -1,21 +1,20 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.downtime import Downtime
-from app.schemas.downtime_schema import DowntimeCreate
+from app.schemas.downtime_schema import DowntimeCreate, DowntimeResponse
+from app.utils.ml_model import predict_downtime_risk
 
-def create_downtime(db: Session, downtime_data: DowntimeCreate):
-    new_downtime = Downtime(**downtime_data.dict())
+async def create_downtime(db: AsyncSession, downtime_data: DowntimeCreate):
+    new_downtime = Downtime(**downtime_data.model_dump())
     db.add(new_downtime)
-    db.commit()
-    db.refresh(new_downtime)
+    await db.commit()
+    await db.refresh(new_downtime)
     return new_downtime
 
-def get_all_downtimes(db: Session):
-    return db.query(Downtime).all()
-
-from app.utils.ml_model import predict_downtime_risk
+async def get_all_downtimes(db: AsyncSession):
+    # Rows come straight from typed DB columns, so skip Pydantic validation
+    stmt = select(*Downtime.__table__.columns)
+    return [DowntimeResponse.model_construct(**row._mapping) for row in await db.execute(stmt)]
 
-def get_downtime_prediction(machine_id: str):
-    return predict_downtime_risk(machine_id)
 def get_downtime_prediction(machine_id: int, avg_temp: float, avg_vibration: float, past_failures: int):
-    from app.utils.ml_model import predict_downtime_risk
     return predict_downtime_risk(machine_id, avg_temp, avg_vibration, past_failures)
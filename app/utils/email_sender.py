@@ -1,15 +1,24 @@
 import yagmail
+import io
 import os
 
-def send_email_with_pdf(receiver_email: str, pdf_path: str):
+def send_email_with_pdf(receiver_email: str, pdf):
+    """Email the report; pdf is a file path or the PDF bytes themselves"""
     sender_email = os.getenv("EMAIL_USER")
     sender_password = os.getenv("EMAIL_PASS")
 
+    if isinstance(pdf, bytes):
+        # yagmail takes file-like attachments and uses .name as the filename
+        attachment = io.BytesIO(pdf)
+        attachment.name = "downtime_report.pdf"
+    else:
+        attachment = pdf
+
     yag = yagmail.SMTP(user=sender_email, password=sender_password)
     yag.send(
         to=receiver_email,
         subject="Downtime Report",
         contents="Please find attached the latest downtime report.",
-        attachments=pdf_path
+        attachments=attachment
     )
     return {"status": "Email sent successfully"}
@@ -1,48 +1,45 @@
+from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from app.models.downtime import Downtime
 import io
-from fastapi.responses import StreamingResponse
 from datetime import datetime
 
+TABLE_HEADER = ["Machine ID", "Reason", "Duration (min)", "Timestamp"]
+
 def generate_downtime_pdf(db: Session):
-    events = db.query(Downtime).all()
+    # Plain column rows fetched 1000 at a time instead of loading every ORM object
+    stmt = select(
+        Downtime.machine_id, Downtime.reason, Downtime.duration_minutes, Downtime.timestamp
+    ).execution_options(yield_per=1000)
+
+    rows = [
+        [str(machine_id), reason, str(duration_minutes), timestamp.strftime("%Y-%m-%d %H:%M")]
+        for machine_id, reason, duration_minutes, timestamp in db.execute(stmt)
+    ]
 
-    if not events:
+    if not rows:
         return None
 
     buffer = io.BytesIO()
-    pdf = canvas.Canvas(buffer, pagesize=letter)
-    width, height = letter
-
-    # Title
-    pdf.setFont("Helvetica-Bold", 16)
-    pdf.drawString(200, 750, "Downtime Report")
-
-    pdf.setFont("Helvetica", 10)
-    pdf.drawString(50, 730, f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-
-    # Table Header
-    pdf.setFont("Helvetica-Bold", 12)
-    pdf.drawString(50, 700, "Machine ID")
-    pdf.drawString(150, 700, "Reason")
-    pdf.drawString(300, 700, "Duration (min)")
-    pdf.drawString(420, 700, "Timestamp")
-
-    y = 680
-    pdf.setFont("Helvetica", 10)
-
-    for event in events:
-        pdf.drawString(50, y, str(event.machine_id))
-        pdf.drawString(150, y, event.reason)
-        pdf.drawString(300, y, str(event.duration_minutes))
-        pdf.drawString(420, y, event.timestamp.strftime("%Y-%m-%d %H:%M"))
-        y -= 20
-        if y < 50:  # New page if needed
-            pdf.showPage()
-            y = 750
-
-    pdf.save()
-    buffer.seek(0)
+    doc = SimpleDocTemplate(buffer, pagesize=letter)
+    styles = getSampleStyleSheet()
+
+    # Platypus lays the table out and splits it across pages, repeating the header
+    table = Table([TABLE_HEADER] + rows, colWidths=[100, 150, 100, 120], repeatRows=1)
+    table.setStyle(TableStyle([
+        ("FONT", (0, 0), (-1, 0), "Helvetica-Bold", 12),
+        ("FONT", (0, 1), (-1, -1), "Helvetica", 10),
+        ("LINEBELOW", (0, 0), (-1, 0), 1, colors.black),
+    ]))
+
+    doc.build([
+        Paragraph("Downtime Report", styles["Title"]),
+        Paragraph(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", styles["Normal"]),
+        Spacer(1, 12),
+        table,
+    ])
     return buffer.getvalue()
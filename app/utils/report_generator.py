@@ -1,33 +1,85 @@
-import matplotlib.pyplot as plt
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from app.models.downtime import Downtime
-import io
-from fastapi.responses import StreamingResponse
+from typing import Optional
+from xml.sax.saxutils import escape
+from fastapi import Response
 
-def generate_downtime_report(db: Session):
-    # Fetch all downtime events
-    events = db.query(Downtime).all()
+# Last rendered chart, keyed on (latest event time, event count) so it is only
+# redrawn when new downtime events arrive; the key doubles as the ETag
+_chart_cache = {"key": None, "svg": None}
 
-    if not events:
+# Chart geometry in SVG user units
+BAR_WIDTH = 30
+BAR_GAP = 20
+PLOT_LEFT = 70
+PLOT_TOP = 50
+PLOT_HEIGHT = 240
+PLOT_BOTTOM = PLOT_TOP + PLOT_HEIGHT
+Y_TICKS = 4
+
+def _render_chart(per_machine):
+    """Bar chart of total downtime per machine, as SVG bytes"""
+    machine_ids = [escape(str(machine_id)) for machine_id, _ in per_machine]
+    durations = [total or 0.0 for _, total in per_machine]
+    top = max(durations) or 1.0
+
+    plot_width = len(durations) * (BAR_WIDTH + BAR_GAP) + BAR_GAP
+    width = max(PLOT_LEFT + plot_width + 20, 320)  # Room for the title
+    height = PLOT_BOTTOM + 90
+
+    # Horizontal grid lines with their minute labels
+    parts = []
+    for i in range(Y_TICKS + 1):
+        y = PLOT_BOTTOM - PLOT_HEIGHT * i / Y_TICKS
+        parts.append(
+            f'<line x1="{PLOT_LEFT}" y1="{y:.1f}" x2="{PLOT_LEFT + plot_width}" y2="{y:.1f}" stroke="#ddd"/>'
+            f'<text x="{PLOT_LEFT - 6}" y="{y + 4:.1f}" text-anchor="end">{top * i / Y_TICKS:.4g}</text>'
+        )
+
+    # Bars, each with its machine ID rotated underneath
+    for i, (machine_id, duration) in enumerate(zip(machine_ids, durations)):
+        x = PLOT_LEFT + BAR_GAP + i * (BAR_WIDTH + BAR_GAP)
+        bar_height = PLOT_HEIGHT * duration / top
+        label_x = x + BAR_WIDTH / 2
+        parts.append(
+            f'<rect x="{x}" y="{PLOT_BOTTOM - bar_height:.1f}" width="{BAR_WIDTH}" height="{bar_height:.1f}" fill="#87ceeb"/>'
+            f'<text x="{label_x}" y="{PLOT_BOTTOM + 14}" text-anchor="end" transform="rotate(-45 {label_x} {PLOT_BOTTOM + 14})">{machine_id}</text>'
+        )
+
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" viewBox="0 0 {width} {height}" '
+        f'font-family="sans-serif" font-size="11">'
+        f'<rect width="100%" height="100%" fill="white"/>'
+        f'<text x="{width / 2}" y="28" text-anchor="middle" font-size="14">Downtime Duration per Machine</text>'
+        f'{"".join(parts)}'
+        f'<line x1="{PLOT_LEFT}" y1="{PLOT_TOP}" x2="{PLOT_LEFT}" y2="{PLOT_BOTTOM}" stroke="black"/>'
+        f'<line x1="{PLOT_LEFT}" y1="{PLOT_BOTTOM}" x2="{PLOT_LEFT + plot_width}" y2="{PLOT_BOTTOM}" stroke="black"/>'
+        f'<text x="{PLOT_LEFT + plot_width / 2}" y="{height - 8}" text-anchor="middle">Machine ID</text>'
+        f'<text x="16" y="{PLOT_TOP + PLOT_HEIGHT / 2}" text-anchor="middle" '
+        f'transform="rotate(-90 16 {PLOT_TOP + PLOT_HEIGHT / 2})">Downtime (minutes)</text>'
+        f'</svg>'
+    ).encode()
+
+def generate_downtime_report(db: Session, if_none_match: Optional[str] = None):
+    latest, count = db.query(func.max(Downtime.timestamp), func.count(Downtime.id)).one()
+
+    if not count:
         return {"error": "No downtime events to generate report"}
 
-    # Prepare data
-    machine_ids = [event.machine_id for event in events]
-    durations = [event.duration_minutes for event in events]
-
-    # Create plot
-    plt.figure(figsize=(8, 5))
-    plt.bar(machine_ids, durations, color="skyblue")
-    plt.xlabel("Machine ID")
-    plt.ylabel("Downtime (minutes)")
-    plt.title("Downtime Duration per Machine")
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-
-    # Save plot to in-memory file
-    img_io = io.BytesIO()
-    plt.savefig(img_io, format='png')
-    img_io.seek(0)
-    plt.close()
-
-    return StreamingResponse(img_io, media_type="image/png")
+    etag = f'"{count}-{latest.isoformat()}"'
+    # Client already holds this chart: nothing to render or send
+    if if_none_match == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    if _chart_cache["key"] != (latest, count):
+        # One row per machine instead of one per event
+        per_machine = (
+            db.query(Downtime.machine_id, func.sum(Downtime.duration_minutes))
+            .group_by(Downtime.machine_id)
+            .all()
+        )
+        _chart_cache["svg"] = _render_chart(per_machine)
+        _chart_cache["key"] = (latest, count)
+
+    return Response(content=_chart_cache["svg"], media_type="image/svg+xml", headers={"ETag": etag})
@@ -1,8 +1,7 @@
-import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split
+from sklearn.ensemble import HistGradientBoostingClassifier
 import joblib
+import pickle
 
 # Step 1: Generate synthetic dataset
 np.random.seed(42)
@@ -14,18 +13,25 @@ data = {
     "downtime_next_week": np.random.randint(0, 2, 200)   # Target (0 = No, 1 = Yes)
 }
 
-df = pd.DataFrame(data)
+# Step 2: Split data (contiguous float32 features, the dtype sklearn's trees use internally)
+X = np.ascontiguousarray(
+    np.column_stack([data["machine_id"], data["avg_temp"], data["avg_vibration"], data["past_failures"]]),
+    dtype=np.float32
+)
+y = data["downtime_next_week"].astype(np.int8)
 
-# Step 2: Split data
-X = df.drop(columns=["downtime_next_week"])
-y = df["downtime_next_week"]
+# One shuffled index split (80/20) straight on the arrays; fancy indexing
+# returns C-ordered copies, the layout fit() wants
+idx = np.random.default_rng(42).permutation(len(X))
+cut = int(len(X) * 0.8)
+X_train, X_test = X[idx[:cut]], X[idx[cut:]]
+y_train, y_test = y[idx[:cut]], y[idx[cut:]]
 
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-
-# Step 3: Train model
-model = RandomForestClassifier(n_estimators=100, random_state=42)
+# Step 3: Train model (histogram-binned gradient boosting: split search runs over 256 bins per
+# feature instead of sorting every sample, and depth is capped)
+model = HistGradientBoostingClassifier(max_iter=100, max_depth=8, learning_rate=0.1, random_state=42)
 model.fit(X_train, y_train)
 
 # Step 4: Save model
-joblib.dump(model, "app/utils/downtime_model.pkl")
+joblib.dump(model, "app/utils/downtime_model.pkl", protocol=pickle.HIGHEST_PROTOCOL, compress=3)
 print("✅ Model trained and saved as downtime_model.pkl")
@@ -1,21 +1,17 @@
 import asyncio
-import subprocess
 import sys
-import time
+
+from sensor_client import SensorManager
+
+SERVER_URL = "ws://localhost:8000/ws/monitor"
 
 async def run_machine_simulator(machine_id, delay=0):
-    """Run a single machine simulator"""
+    """Run a single machine simulator as a task in this process"""
     if delay > 0:
         await asyncio.sleep(delay)
     
-    # Run sensor_client.py with specific machine ID
-    env = {"MACHINE_ID": machine_id}
-    process = await asyncio.create_subprocess_exec(
-        sys.executable, "sensor_client.py", 
-        env={**dict(os.environ), **env},
-        cwd="."
-    )
-    await process.wait()
+    sensor_manager = SensorManager(machine_id, SERVER_URL)
+    await sensor_manager.run_monitoring_loop()
 
 async def main():
     """Run multiple machine simulators"""
@@ -38,5 +34,11 @@ async def main():
             task.cancel()
 
 if __name__ == "__main__":
-    import os
+    # uvloop is optional (and has no Windows build); fall back to the default loop
+    if sys.platform != 'win32':
+        try:
+            import uvloop
+            uvloop.install()
+        except ImportError:
+            pass
     asyncio.run(main())
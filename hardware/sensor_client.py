@@ -1,21 +1,33 @@
 import asyncio
-import json
+import collections
+from array import array
+import orjson
 import time
 import websockets
-import requests
+import aiohttp
 from datetime import datetime
+from typing import Optional, Tuple
+from urllib.parse import urlparse
 import logging
 import math
-import random
 import sys
 import os
+import numpy as np
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Check if running on Raspberry Pi
-IS_RASPBERRY_PI = os.path.exists('/proc/device-tree/model') and 'Raspberry Pi' in open('/proc/device-tree/model', 'rb').read().decode('utf-8', errors='ignore')
+def _detect_pi():
+    """True if the device-tree model names a Raspberry Pi"""
+    try:
+        with open('/proc/device-tree/model', 'rb') as f:
+            return b'Raspberry Pi' in f.read()
+    except OSError:
+        return False
+
+IS_RASPBERRY_PI = _detect_pi()
 
 # Only import hardware libraries on Raspberry Pi
 if IS_RASPBERRY_PI:
@@ -27,13 +39,125 @@ if IS_RASPBERRY_PI:
         import smbus2 as smbus
         import adafruit_ds3231  # For RTC
         HARDWARE_AVAILABLE = True
+        # pigpio drives the BCM2835 SPI block directly; falls back to spidev without it
+        try:
+            import pigpio
+            PIGPIO_AVAILABLE = True
+        except ImportError:
+            PIGPIO_AVAILABLE = False
         logger.info("Running on Raspberry Pi - hardware libraries loaded")
     except ImportError as e:
         logger.warning(f"Hardware libraries not available: {e}")
         HARDWARE_AVAILABLE = False
+        PIGPIO_AVAILABLE = False
 else:
     logger.info("Running on non-Pi system - using simulated sensors")
     HARDWARE_AVAILABLE = False
+    PIGPIO_AVAILABLE = False
+
+# Numba is optional - the ADC conversion runs as plain Python without it
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# ADXL335 on a 3.3V supply: 1.65V at 0g, ~300mV/g, read through the 10-bit MCP3008
+ADC_TO_G = 3.3 / 1024.0 / 0.3
+ADC_ZERO_G = 1.65 / 0.3
+
+def _vibration_from_adc(x_raw: int, y_raw: int, z_raw: int) -> float:
+    """Vibration magnitude in G from raw X/Y/Z ADC counts"""
+    x_g = x_raw * ADC_TO_G - ADC_ZERO_G
+    y_g = y_raw * ADC_TO_G - ADC_ZERO_G
+    z_g = z_raw * ADC_TO_G - ADC_ZERO_G
+    return math.sqrt(x_g * x_g + y_g * y_g + z_g * z_g)
+
+if NUMBA_AVAILABLE:
+    _vibration_from_adc = njit(cache=True, fastmath=True)(_vibration_from_adc)
+    _vibration_from_adc(512, 512, 512)  # Compile now, not on the first sensor read
+
+# 1024-step sine table for the simulated sensors' slow oscillations
+_SIN_LUT = array('d', (math.sin(2 * math.pi * i / 1024) for i in range(1024)))
+_LUT_STEPS_PER_RAD = 1024 / (2 * math.pi)
+
+def _sin_lut(x: float) -> float:
+    """sin(x) to table resolution"""
+    return _SIN_LUT[int(x * _LUT_STEPS_PER_RAD) & 1023]
+
+def _cos_lut(x: float) -> float:
+    """cos(x) to table resolution (sine a quarter turn ahead)"""
+    return _SIN_LUT[(int(x * _LUT_STEPS_PER_RAD) + 256) & 1023]
+
+# Running next to the server (simulator / development): predict with its model
+# in-process instead of an HTTP loopback. Needs the repository root on sys.path.
+try:
+    from app.ml.model import MODEL_PATH, predict_downtime_batch, risk_level as local_risk_level
+    LOCAL_MODEL_AVAILABLE = os.path.exists(MODEL_PATH)
+except ImportError:
+    LOCAL_MODEL_AVAILABLE = False
+LOCAL_API_HOSTS = ("localhost", "127.0.0.1")
+
+# Readings are sampled every SAMPLE_INTERVAL seconds into a ring buffer of
+# READING_BUFFER_SIZE (oldest dropped when full) and sent in batches of up to
+# SEND_BATCH_MAX: whatever piled up while the previous send was in flight
+SAMPLE_INTERVAL = 5.0
+READING_BUFFER_SIZE = 64
+SEND_BATCH_MAX = 16
+
+# MCP3008 single-ended read command per channel: start bit, SGL/DIFF + channel, dummy byte
+MCP3008_COMMANDS = [[1, (8 + channel) << 4, 0] for channel in range(8)]
+# MLX90614 I2C address and object temperature (Tobj1) RAM register
+MLX90614_ADDR = 0x5A
+MLX90614_TOBJ1 = 0x07
+
+# ADXL335 X/Y/Z outputs are wired to MCP3008 channels 0-2, the ACS712 to channel 3
+VIBRATION_CHANNELS = (0, 1, 2)
+CURRENT_CHANNEL = 3
+ADC_CHANNELS = VIBRATION_CHANNELS + (CURRENT_CHANNEL,)
+
+# Uniform draws for the simulated sensors are generated this many at a time
+RNG_POOL_SIZE = 8192
+
+# Pharma industry standard shifts by hour: (shift id, name, extra downtime risk)
+_DAY_SHIFT = (1, "Day Shift (06:00-14:00)", 0.0)
+_EVENING_SHIFT = (2, "Evening Shift (14:00-22:00)", 0.03)
+_NIGHT_SHIFT = (3, "Night Shift (22:00-06:00)", 0.08)
+_SHIFT_BY_HOUR = [_NIGHT_SHIFT] * 6 + [_DAY_SHIFT] * 8 + [_EVENING_SHIFT] * 8 + [_NIGHT_SHIFT] * 2
+_SHIFT_RISK = {shift: extra_risk for shift, _, extra_risk in (_DAY_SHIFT, _EVENING_SHIFT, _NIGHT_SHIFT)}
+
+# Recent (machine temp, humidity, vibration) samples kept for the rolling risk score
+RISK_WINDOW = 60
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Predictions remembered per SensorManager, to skip the API for repeat readings
+PRED_CACHE_SIZE = 128
+
+# WebSocket heartbeat (protocol-level ping/pong)
+WS_PING_INTERVAL = 25
+WS_PING_TIMEOUT = 10
+
+# Reconnect delay after a failed WebSocket connect, doubled on each failure
+WS_BACKOFF_MIN = 1.0
+WS_BACKOFF_MAX = 60.0
+
+class PigpioSpi:
+    """MCP3008 SPI handle on the pigpio daemon, with the spidev calls we use"""
+    
+    def __init__(self, channel=0, baud=1_000_000):
+        self.pi = pigpio.pi()
+        if not self.pi.connected:
+            raise RuntimeError("pigpio daemon not running")
+        self.handle = self.pi.spi_open(channel, baud, 0)  # SPI mode 0 on CE<channel>
+        
+    def xfer2(self, data):
+        _, rx = self.pi.spi_xfer(self.handle, data)
+        return rx
+        
+    def close(self):
+        self.pi.spi_close(self.handle)
+        self.pi.stop()
 
 class SensorManager:
     def __init__(self, machine_id="Machine1", server_url="ws://localhost:8000/ws/monitor"):
@@ -41,6 +165,33 @@ class SensorManager:
         self.server_url = server_url
         self.api_base = server_url.replace("ws://", "http://").replace("/ws/monitor", "")
         
+        # Keep-alive HTTP session for /predict, opened on first use inside the event loop
+        self.http = None
+        
+        # Local model instead of the API when the server is on this host
+        use_local = LOCAL_MODEL_AVAILABLE and urlparse(self.api_base).hostname in LOCAL_API_HOSTS
+        self.local_predict = predict_downtime_batch if use_local else None
+        
+        # LRU of recent predictions keyed by _prediction_key
+        self._pred_cache = collections.OrderedDict()
+        
+        # Rolling window of recent readings for calculate_risk_score
+        self.risk_window = collections.deque(maxlen=RISK_WINDOW)
+        self.risk_moving_avg = 0.0
+        
+        # Pool of uniform [0, 1) draws for simulated readings, refilled by _uniform
+        self._rng = np.random.default_rng()
+        self._rng_pool = []
+        self._rng_i = 0
+        
+        # Raw MCP3008 counts for ADC_CHANNELS, sampled once per collect_sensor_data
+        self._last_adc = None
+        
+        # Long-lived WebSocket to the server, (re)connected by _get_ws
+        self.ws = None
+        self._ws_backoff = WS_BACKOFF_MIN
+        self._ws_retry_at = 0.0
+        
         # Initialize sensors
         self.setup_sensors()
         
@@ -51,8 +202,10 @@ class SensorManager:
                 # DHT22 Temperature/Humidity sensor (GPIO pin 4)
                 self.dht22 = adafruit_dht.DHT22(board.D4)
                 
-                # I2C for MLX90614 IR temperature sensor
+                # I2C for MLX90614 IR temperature sensor; the raw SMBus handle
+                # is opened once and reused for every read
                 self.i2c = busio.I2C(board.SCL, board.SDA)
+                self.smbus = smbus.SMBus(1)
                 
                 # ADXL335 vibration sensor (analog - using MCP3008 ADC)
                 self.setup_vibration_sensor()
@@ -68,6 +221,7 @@ class SensorManager:
                 logger.info("Using simulated sensors for development")
                 self.dht22 = None
                 self.i2c = None
+                self.smbus = None
                 self.spi = None
                 self.rtc = None
             
@@ -76,9 +230,28 @@ class SensorManager:
             logger.info("Falling back to simulated sensors")
             self.dht22 = None
             self.i2c = None
+            self.smbus = None
             self.spi = None
             self.rtc = None
 
+    def __del__(self):
+        """Release the I2C bus and SPI handles"""
+        for bus in ("smbus", "spi"):
+            try:
+                if getattr(self, bus, None) is not None:
+                    getattr(self, bus).close()
+            except Exception:
+                pass
+
+    def _uniform(self, low: float, high: float) -> float:
+        """Uniform float in [low, high) from the pre-generated pool"""
+        i = self._rng_i
+        if i >= len(self._rng_pool):
+            self._rng_pool = self._rng.random(RNG_POOL_SIZE).tolist()
+            i = 0
+        self._rng_i = i + 1
+        return low + (high - low) * self._rng_pool[i]
+
     def setup_current_sensor(self):
         """Setup ACS712 current sensor for load monitoring"""
         try:
@@ -95,9 +268,16 @@ class SensorManager:
         """Setup ADXL335 vibration sensor via MCP3008 ADC"""
         try:
             if HARDWARE_AVAILABLE:
-                self.spi = spidev.SpiDev()
-                self.spi.open(0, 0)  # Bus 0, Device 0
-                self.spi.max_speed_hz = 1000000
+                self.spi = None
+                if PIGPIO_AVAILABLE:
+                    try:
+                        self.spi = PigpioSpi(0, 1000000)  # CE0 at 1 MHz
+                    except Exception as e:
+                        logger.warning(f"pigpio SPI unavailable: {e}, using spidev")
+                if self.spi is None:
+                    self.spi = spidev.SpiDev()
+                    self.spi.open(0, 0)  # Bus 0, Device 0
+                    self.spi.max_speed_hz = 1000000
                 logger.info("ADXL335 vibration sensor ready")
             else:
                 self.spi = None
@@ -120,28 +300,27 @@ class SensorManager:
     def read_mlx90614_temp(self):
         """Read temperature from MLX90614 IR sensor"""
         try:
-            if HARDWARE_AVAILABLE and self.i2c:
-                # MLX90614 I2C address is typically 0x5A
-                bus = smbus.SMBus(1)
-                
-                # Read object temperature
-                temp_object = bus.read_word_data(0x5A, 0x07)
-                temp_object = temp_object * 0.02 - 273.15
+            if HARDWARE_AVAILABLE and self.smbus:
+                # Object temperature LSB, MSB and PEC in one transaction (PEC unchecked)
+                lsb, msb, _ = self.smbus.read_i2c_block_data(MLX90614_ADDR, MLX90614_TOBJ1, 3)
+                if msb & 0x80:
+                    raise ValueError("MLX90614 error flag set")
+                temp_object = ((msb << 8) | lsb) * 0.02 - 273.15
                 
                 return round(temp_object, 2)
             else:
                 # Simulated temperature with realistic patterns
                 base_temp = 75  # Base machine temperature
-                time_factor = math.sin(time.time() * 0.1) * 5  # Slow oscillation
-                noise = random.uniform(-2, 3)
+                time_factor = _sin_lut(time.time() * 0.1) * 5  # Slow oscillation
+                noise = self._uniform(-2, 3)
                 return round(base_temp + time_factor + noise, 2)
                 
         except Exception as e:
             logger.warning(f"MLX90614 read error: {e}, using simulated data")
             # Fallback to simulated temperature
             base_temp = 75
-            time_factor = math.sin(time.time() * 0.1) * 5
-            noise = random.uniform(-2, 3)
+            time_factor = _sin_lut(time.time() * 0.1) * 5
+            noise = self._uniform(-2, 3)
             return round(base_temp + time_factor + noise, 2)
             
     def read_dht22(self):
@@ -158,13 +337,13 @@ class SensorManager:
             else:
                 # Simulated environmental data
                 base_temp = 22  # Room temperature
-                temp_variation = math.sin(time.time() * 0.05) * 3
-                temp_noise = random.uniform(-1, 2)
+                temp_variation = _sin_lut(time.time() * 0.05) * 3
+                temp_noise = self._uniform(-1, 2)
                 temperature = round(base_temp + temp_variation + temp_noise, 2)
                 
                 base_humidity = 55  # Base humidity
-                humidity_variation = math.cos(time.time() * 0.03) * 10
-                humidity_noise = random.uniform(-3, 3)
+                humidity_variation = _cos_lut(time.time() * 0.03) * 10
+                humidity_noise = self._uniform(-3, 3)
                 humidity = round(base_humidity + humidity_variation + humidity_noise, 2)
                 
                 return temperature, humidity
@@ -173,12 +352,12 @@ class SensorManager:
             logger.warning(f"DHT22 read error: {e}, using simulated data")
             # Fallback to simulated data
             base_temp = 22
-            temp_variation = math.sin(time.time() * 0.05) * 3
-            temperature = round(base_temp + temp_variation + random.uniform(-1, 2), 2)
+            temp_variation = _sin_lut(time.time() * 0.05) * 3
+            temperature = round(base_temp + temp_variation + self._uniform(-1, 2), 2)
             
             base_humidity = 55
-            humidity_variation = math.cos(time.time() * 0.03) * 10
-            humidity = round(base_humidity + humidity_variation + random.uniform(-3, 3), 2)
+            humidity_variation = _cos_lut(time.time() * 0.03) * 10
+            humidity = round(base_humidity + humidity_variation + self._uniform(-3, 3), 2)
             
             return temperature, humidity
             
@@ -186,25 +365,19 @@ class SensorManager:
         """Read vibration data from ADXL335"""
         try:
             if HARDWARE_AVAILABLE and self.spi:
-                # Read X, Y, Z axes from MCP3008 channels 0, 1, 2
-                x_raw = self.read_adc_channel(0)
-                y_raw = self.read_adc_channel(1)
-                z_raw = self.read_adc_channel(2)
-                
-                # Convert to G-force (assuming 3.3V supply, sensitivity ~300mV/g)
-                x_g = (x_raw * 3.3 / 1024 - 1.65) / 0.3
-                y_g = (y_raw * 3.3 / 1024 - 1.65) / 0.3
-                z_g = (z_raw * 3.3 / 1024 - 1.65) / 0.3
+                # X, Y, Z axes from MCP3008 channels 0, 1, 2 (this cycle's sweep if taken)
+                adc = self._last_adc or self.read_adc_channels(ADC_CHANNELS)
+                x_raw, y_raw, z_raw = adc[0], adc[1], adc[2]
                 
-                # Calculate total vibration magnitude
-                vibration = math.sqrt(x_g**2 + y_g**2 + z_g**2)
+                # Convert to G-force and take the total vibration magnitude
+                vibration = _vibration_from_adc(x_raw, y_raw, z_raw)
                 return round(vibration, 3)
             else:
                 # Simulated vibration with realistic machine patterns
                 base_vib = 1.8  # Base vibration level
-                machine_cycle = math.sin(time.time() * 2) * 0.5  # Machine operation cycle
-                random_spike = random.uniform(0, 1.2) if random.random() < 0.1 else 0  # Occasional spikes
-                noise = random.uniform(-0.2, 0.3)
+                machine_cycle = _sin_lut(time.time() * 2) * 0.5  # Machine operation cycle
+                random_spike = self._uniform(0, 1.2) if self._uniform(0, 1) < 0.1 else 0  # Occasional spikes
+                noise = self._uniform(-0.2, 0.3)
                 vibration = base_vib + machine_cycle + random_spike + noise
                 return round(max(0.5, vibration), 3)
                 
@@ -212,27 +385,35 @@ class SensorManager:
             logger.warning(f"ADXL335 read error: {e}, using simulated data")
             # Fallback to simulated vibration
             base_vib = 1.8
-            machine_cycle = math.sin(time.time() * 2) * 0.5
-            random_spike = random.uniform(0, 1.2) if random.random() < 0.1 else 0
-            noise = random.uniform(-0.2, 0.3)
+            machine_cycle = _sin_lut(time.time() * 2) * 0.5
+            random_spike = self._uniform(0, 1.2) if self._uniform(0, 1) < 0.1 else 0
+            noise = self._uniform(-0.2, 0.3)
             vibration = base_vib + machine_cycle + random_spike + noise
             return round(max(0.5, vibration), 3)
             
-    def read_adc_channel(self, channel):
-        """Read single channel from MCP3008 ADC"""
-        if not self.spi or channel < 0 or channel > 7:
-            return random.randint(400, 600)  # Simulated ADC reading
-            
-        adc = self.spi.xfer2([1, (8 + channel) << 4, 0])
-        data = ((adc[1] & 3) << 8) + adc[2]
-        return data
+    def read_adc_channels(self, channels):
+        """Read several MCP3008 channels back to back.
+        
+        Each conversion is its own 3-byte xfer2: the MCP3008 only starts a new
+        conversion after CS goes high, which xfer2 holds low for a whole buffer.
+        """
+        if not self.spi:
+            return [int(self._uniform(400, 601)) for _ in channels]  # Simulated ADC readings
+        
+        xfer2 = self.spi.xfer2
+        values = []
+        for channel in channels:
+            adc = xfer2(MCP3008_COMMANDS[channel])
+            values.append(((adc[1] & 3) << 8) + adc[2])
+        return values
         
     def read_acs712_current(self):
         """Read current from ACS712 current sensor"""
         try:
             if HARDWARE_AVAILABLE and self.spi:
-                # Read current sensor from MCP3008 channel 3
-                adc_value = self.read_adc_channel(3)
+                # Current sensor on MCP3008 channel 3 (this cycle's sweep if taken)
+                adc = self._last_adc or self.read_adc_channels(ADC_CHANNELS)
+                adc_value = adc[3]
                 
                 # Convert ADC value to voltage (0-3.3V for 1024 levels)
                 voltage = (adc_value * 3.3) / 1024.0
@@ -250,8 +431,8 @@ class SensorManager:
                 # Simulated current and load based on vibration + time patterns
                 base_current = 3.5  # Base current in amps
                 vibration_factor = (getattr(self, 'last_vibration', 2.0) - 1.0) * 0.8
-                time_factor = math.sin(time.time() * 0.02) * 1.2
-                noise = random.uniform(-0.3, 0.5)
+                time_factor = _sin_lut(time.time() * 0.02) * 1.2
+                noise = self._uniform(-0.3, 0.5)
                 current_amps = base_current + vibration_factor + time_factor + noise
                 current_amps = max(1.0, min(8.0, current_amps))  # Realistic range
                 
@@ -264,8 +445,8 @@ class SensorManager:
             logger.warning(f"ACS712 current sensor read error: {e}, using simulated data")
             # Fallback to simulated data
             base_current = 3.5
-            time_factor = math.sin(time.time() * 0.02) * 1.2
-            noise = random.uniform(-0.3, 0.5)
+            time_factor = _sin_lut(time.time() * 0.02) * 1.2
+            noise = self._uniform(-0.3, 0.5)
             current_amps = max(1.0, min(8.0, base_current + time_factor + noise))
             load_percentage = (current_amps / 8.0) * 100
             return round(load_percentage, 1), round(current_amps, 2)
@@ -275,115 +456,98 @@ class SensorManager:
         load_percentage, _ = self.read_acs712_current()
         return load_percentage
 
-    def get_current_shift(self):
+    def get_current_shift(self) -> Tuple[int, str]:
         """Enhanced shift detection with RTC backup"""
         try:
             # Try RTC first for accurate time
             if HARDWARE_AVAILABLE and self.rtc:
-                current_time = self.rtc.datetime
-                hour = current_time.tm_hour
+                hour = self.rtc.datetime.tm_hour
             else:
                 # Fallback to system time
-                hour = datetime.now().hour
-        
-            # Pharma industry standard shifts
-            shifts = {
-                "day": {"start": 6, "end": 14, "id": 1, "name": "Day Shift (06:00-14:00)"},
-                "evening": {"start": 14, "end": 22, "id": 2, "name": "Evening Shift (14:00-22:00)"},
-                "night": {"start": 22, "end": 6, "id": 3, "name": "Night Shift (22:00-06:00)"}
-            }
+                hour = time.localtime().tm_hour
         
-            if 6 <= hour < 14:
-                return shifts["day"]["id"], shifts["day"]["name"]
-            elif 14 <= hour < 22:
-                return shifts["evening"]["id"], shifts["evening"]["name"]
-            else:
-                return shifts["night"]["id"], shifts["night"]["name"]
+            shift, name, _ = _SHIFT_BY_HOUR[hour]
+            return shift, name
             
         except Exception as e:
             logger.warning(f"Shift detection error: {e}, using default")
             return 1, "Day Shift"  # Default fallback
 
-    def calculate_risk_score(self, temp, humidity, vibration):
-        """Calculate downtime risk based on sensor readings"""
-        risk = 0.0
+    def calculate_risk_score(self, temp: float, humidity: float, vibration: float) -> float:
+        """Calculate downtime risk based on sensor readings.
         
-        # Temperature risk (optimal range: 70-80°C for machine temp)
-        if temp > 85:
-            risk += (temp - 85) * 0.03
-        elif temp < 65:
-            risk += (65 - temp) * 0.02
-            
-        # Humidity risk (optimal range: 40-60%)
-        if humidity > 70:
-            risk += (humidity - 70) * 0.01
-        elif humidity < 30:
-            risk += (30 - humidity) * 0.01
-            
-        # Vibration risk (normal < 2.5)
-        if vibration > 2.5:
-            risk += (vibration - 2.5) * 0.2
-        elif vibration > 4.0:
-            risk += (vibration - 2.5) * 0.4  # Critical vibration
-            
-        return min(1.0, max(0.0, risk))
+        Scores the whole recent window in one vectorized pass: returns the
+        latest reading's risk and keeps the window average in risk_moving_avg.
+        """
+        self.risk_window.append((temp, humidity, vibration))
+        readings = np.asarray(self.risk_window, dtype=np.float32)
+        temp, humidity, vibration = readings[:, 0], readings[:, 1], readings[:, 2]
         
-    def calculate_comprehensive_risk(self, temp, humidity, vibration, load):
+        risk = (
+            # Temperature risk (optimal range: 70-80°C for machine temp)
+            0.03 * np.clip(temp - 85, 0, None)
+            + 0.02 * np.clip(65 - temp, 0, None)
+            # Humidity risk (optimal range: 40-60%)
+            + 0.01 * np.clip(humidity - 70, 0, None)
+            + 0.01 * np.clip(30 - humidity, 0, None)
+            # Vibration risk (normal < 2.5)
+            + 0.2 * np.clip(vibration - 2.5, 0, None)
+        )
+        risk = np.clip(risk, 0.0, 1.0)
+        
+        self.risk_moving_avg = float(risk.mean())
+        return float(risk[-1])
+        
+    def calculate_comprehensive_risk(self, temp: float, humidity: float, vibration: float, load: float, shift: Optional[int] = None) -> float:
         """Calculate downtime risk including shift factors"""
-        risk = 0.0
+        risk = self.calculate_risk_score(temp, humidity, vibration)
         
-        # Temperature risk (optimal range: 70-80°C for machine temp)
-        if temp > 85:
-            risk += (temp - 85) * 0.03
-        elif temp < 65:
-            risk += (65 - temp) * 0.02
-            
-        # Humidity risk (optimal range: 40-60%)
-        if humidity > 70:
-            risk += (humidity - 70) * 0.01
-        elif humidity < 30:
-            risk += (30 - humidity) * 0.01
-            
-        # Vibration risk (normal < 2.5)
-        if vibration > 2.5:
-            risk += (vibration - 2.5) * 0.2
-        elif vibration > 4.0:
-            risk += (vibration - 2.5) * 0.4  # Critical vibration
-            
-        # Shift risk factor (based on industry data)
-        shift, _ = self.get_current_shift()
-        if shift == 3:  # Night shift
-            risk += 0.08  # 8% additional risk
-        elif shift == 2:  # Evening shift  
-            risk += 0.03  # 3% additional risk
-        # Day shift = baseline (no additional risk)
+        # Shift risk factor (based on industry data): night +8%, evening +3%
+        if shift is None:
+            shift, _ = self.get_current_shift()
+        risk += _SHIFT_RISK[shift]
         
         return min(1.0, max(0.0, risk))
         
+    def read_all_sensors(self):
+        """Read every sensor once (blocking on real hardware)"""
+        # Sample every MCP3008 channel once; vibration and current share the sweep
+        self._last_adc = self.read_adc_channels(ADC_CHANNELS) if HARDWARE_AVAILABLE and self.spi else None
+        
+        # Read environmental sensors
+        dht_temp, humidity = self.read_dht22()
+        
+        # Read machine temperature (IR sensor)
+        machine_temp = self.read_mlx90614_temp()
+        
+        # Read vibration
+        vibration = self.read_adxl335_vibration()
+        self.last_vibration = vibration  # Store for load calculation
+        
+        # Read machine load from ACS712 current sensor
+        machine_load, current_amps = self.read_acs712_current()
+        
+        return dht_temp, humidity, machine_temp, vibration, machine_load, current_amps
+        
     async def collect_sensor_data(self):
         """Collect data from all sensors"""
         try:
-            # Read environmental sensors
-            dht_temp, humidity = self.read_dht22()
-            
-            # Read machine temperature (IR sensor)
-            machine_temp = self.read_mlx90614_temp()
-            
-            # Read vibration
-            vibration = self.read_adxl335_vibration()
-            self.last_vibration = vibration  # Store for load calculation
-            
-            # Read machine load from ACS712 current sensor
-            machine_load, current_amps = self.read_acs712_current()
+            if HARDWARE_AVAILABLE:
+                # DHT22 / I2C / SPI reads can block for hundreds of ms; keep them
+                # off the event loop so WebSocket and HTTP sends keep running
+                readings = await asyncio.to_thread(self.read_all_sensors)
+            else:
+                readings = self.read_all_sensors()
+            dht_temp, humidity, machine_temp, vibration, machine_load, current_amps = readings
             
             # Get current shift
             shift, shift_name = self.get_current_shift()
             
             # Calculate comprehensive risk score
-            risk_score = self.calculate_comprehensive_risk(machine_temp, humidity, vibration, machine_load)
+            risk_score = self.calculate_comprehensive_risk(machine_temp, humidity, vibration, machine_load, shift)
                 
             sensor_data = {
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": datetime.now(),  # orjson writes datetimes as ISO 8601
                 "machine_id": self.machine_id,
                 "temperature": machine_temp,
                 "ambient_temp": dht_temp,
@@ -394,6 +558,7 @@ class SensorManager:
                 "shift": shift,
                 "shift_name": shift_name,
                 "downtime_probability": round(risk_score, 3),
+                "risk_moving_avg": round(self.risk_moving_avg, 3),
                 "sensor_status": "online" if HARDWARE_AVAILABLE else "simulated",
                 "power_consumption": round(current_amps * 220, 1)  # Estimated watts (assuming 220V)
             }
@@ -405,58 +570,184 @@ class SensorManager:
             logger.error(f"Error collecting sensor data: {e}")
             return None
             
-    async def send_to_api(self, data):
-        """Send sensor data to FastAPI backend"""
-        try:
-            # Send prediction request
-            response = requests.get(f"{self.api_base}/predict", params={
-                "temperature": data["temperature"],
+    @staticmethod
+    def _prediction_key(data):
+        """Coarsened model inputs; nearby consecutive readings share a prediction"""
+        return (
+            round(data["ambient_temp"], 1),
+            round(data["temperature"], 1),
+            round(data["humidity"], 1),
+            round(data["vibration"], 2),
+            round(data["current_amps"], 1),
+            data["shift"]
+        )
+    
+    async def send_to_api(self, items):
+        """Get ML predictions for a batch of readings from the FastAPI backend"""
+        # Serve repeat readings from the local LRU, only ask the server for the rest
+        misses = []
+        for data in items:
+            key = self._prediction_key(data)
+            prediction = self._pred_cache.get(key)
+            if prediction is not None:
+                self._pred_cache.move_to_end(key)
+                data["ml_prediction"] = prediction
+            else:
+                misses.append((key, data))
+        if not misses:
+            return
+        
+        rows = [
+            {
+                "ambient_temp": data["ambient_temp"],
+                "machine_temp": data["temperature"],
+                "humidity": data["humidity"],
                 "vibration": data["vibration"],
-                "load": data["machine_load"],
+                "current": data["current_amps"],
                 "shift": data["shift"]
-            }, timeout=5)
+            }
+            for _, data in misses
+        ]
+        try:
+            if self.local_predict is not None:
+                predictions = await self._predict_local(rows)
+            else:
+                predictions = await self._predict_remote(rows)
+            if predictions is None:
+                return
             
-            if response.status_code == 200:
-                prediction = response.json()
+            for (key, data), prediction in zip(misses, predictions):
                 data["ml_prediction"] = prediction
-                logger.info(f"ML Prediction: {prediction.get('downtime_predicted', 'N/A')}")
+                self._pred_cache[key] = prediction
+            while len(self._pred_cache) > PRED_CACHE_SIZE:
+                self._pred_cache.popitem(last=False)
+            logger.info(f"ML Predictions: {[p.get('downtime_predicted', 'N/A') for p in predictions]}")
             
         except Exception as e:
             logger.warning(f"API request failed: {e}")
+    
+    async def _predict_remote(self, rows):
+        """POST feature rows to /predict_batch; None unless the API answers 200"""
+        if self.http is None:
+            # Small keep-alive pool: the client only ever talks to one API host
+            self.http = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=4, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=5)
+            )
+        
+        # One request for the whole batch, without blocking the event loop
+        async with self.http.post(f"{self.api_base}/predict_batch", headers=JSON_HEADERS, data=orjson.dumps(rows)) as response:
+            if response.status != 200:
+                return None
+            return orjson.loads(await response.read())["predictions"]
+    
+    async def _predict_local(self, rows):
+        """Run the server's model in this process, same response shape as /predict_batch"""
+        X = np.array([tuple(row.values()) for row in rows], dtype=np.float32)
+        probabilities = await asyncio.to_thread(self.local_predict, X)
+        return [
+            {
+                "downtime_predicted": bool(p > 0.5),
+                "downtime_probability": round(float(p), 3),
+                "risk_level": local_risk_level(p)
+            }
+            for p in probabilities
+        ]
             
-    async def send_to_websocket(self, data):
-        """Send real-time data via WebSocket"""
+    async def _get_ws(self):
+        """Return the open WebSocket, connecting (with backoff) if needed"""
+        if self.ws is not None:
+            return self.ws
+        
+        now = time.monotonic()
+        if now < self._ws_retry_at:
+            return None
+        
+        try:
+            # Heartbeat: a ping every WS_PING_INTERVAL s, and the connection is
+            # closed if no pong arrives within WS_PING_TIMEOUT s. Inbound queue is
+            # bounded since the server never needs to send us much.
+            self.ws = await websockets.connect(
+                self.server_url,
+                ping_interval=WS_PING_INTERVAL,
+                ping_timeout=WS_PING_TIMEOUT,
+                max_queue=32
+            )
+            self._ws_backoff = WS_BACKOFF_MIN
+            logger.info(f"WebSocket connected to {self.server_url}")
+        except Exception as e:
+            logger.warning(f"WebSocket connect failed: {e}, retrying in {self._ws_backoff:.0f}s")
+            self._ws_retry_at = now + self._ws_backoff
+            self._ws_backoff = min(self._ws_backoff * 2, WS_BACKOFF_MAX)
+        return self.ws
+    
+    async def send_to_websocket(self, items):
+        """Send a batch of real-time readings via WebSocket"""
+        websocket = await self._get_ws()
+        if websocket is None:
+            return
+        
+        message = {
+            "type": "batch",
+            "machine_id": self.machine_id,
+            "items": items
+        }
+        # orjson is C-fast; decode so the server's receive_text() still gets a text frame
+        payload = orjson.dumps(message).decode()
         try:
-            async with websockets.connect(self.server_url) as websocket:
-                message = {
-                    "type": "sensor_update",
-                    **data
-                }
-                await websocket.send(json.dumps(message))
-                logger.info("Data sent via WebSocket")
+            try:
+                await websocket.send(payload)
+            except websockets.exceptions.ConnectionClosed:
+                # Closed since the last send (e.g. missed heartbeat): reconnect once
+                # and resend, instead of losing this batch
+                self.ws = None
+                websocket = await self._get_ws()
+                if websocket is None:
+                    return
+                await websocket.send(payload)
+            logger.info("Data sent via WebSocket")
                 
         except Exception as e:
+            # Drop the connection; the next tick reconnects
             logger.warning(f"WebSocket send failed: {e}")
+            self.ws = None
             
     async def run_monitoring_loop(self):
         """Main monitoring loop"""
         logger.info(f"Starting sensor monitoring for {self.machine_id}")
         logger.info(f"Hardware mode: {'Real sensors' if HARDWARE_AVAILABLE else 'Simulated'}")
         
+        # Ring buffer between sampler and sender; the event is created here so
+        # it belongs to the running event loop
+        self.buf = collections.deque(maxlen=READING_BUFFER_SIZE)
+        self.buf_event = asyncio.Event()
+        try:
+            await asyncio.gather(self._producer(), self._consumer())
+        finally:
+            if self.http is not None:
+                await self.http.close()
+                self.http = None
+            if self.ws is not None:
+                await self.ws.close()
+                self.ws = None
+    
+    async def _producer(self):
+        """Read the sensors on a fixed SAMPLE_INTERVAL tick into the ring buffer"""
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
         while True:
             try:
                 # Collect sensor data
                 sensor_data = await self.collect_sensor_data()
                 
                 if sensor_data:
-                    # Send to API for ML prediction
-                    await self.send_to_api(sensor_data)
-                    
-                    # Send real-time update via WebSocket
-                    await self.send_to_websocket(sensor_data)
+                    # A stuck sender (server down) only costs the oldest readings
+                    self.buf.append(sensor_data)
+                    self.buf_event.set()
                     
-                # Wait 5 seconds before next reading
-                await asyncio.sleep(5)
+                # Sleep to the next tick, so read time and sends don't drift the cadence
+                next_tick = max(next_tick + SAMPLE_INTERVAL, loop.time())
+                await asyncio.sleep(next_tick - loop.time())
                 
             except KeyboardInterrupt:
                 logger.info("Monitoring stopped by user")
@@ -464,17 +755,38 @@ class SensorManager:
             except Exception as e:
                 logger.error(f"Error in monitoring loop: {e}")
                 await asyncio.sleep(10)  # Wait longer on error
+                next_tick = loop.time()
+    
+    async def _consumer(self):
+        """Drain buffered readings in batches: predict via the API, then push via WebSocket"""
+        while True:
+            if not self.buf:
+                self.buf_event.clear()
+                await self.buf_event.wait()
+            items = [self.buf.popleft() for _ in range(min(len(self.buf), SEND_BATCH_MAX))]
+            
+            try:
+                # Send to API for ML prediction
+                await self.send_to_api(items)
+                
+                # Send real-time update via WebSocket
+                await self.send_to_websocket(items)
+            except Exception as e:
+                logger.error(f"Error sending batch: {e}")
 
 if __name__ == "__main__":
-    # Configuration - you can change these
-    MACHINE_ID = "Machine1"  # Change this for different machines
+    # Configuration - you can change these (or set MACHINE_ID in the environment)
+    MACHINE_ID = os.getenv("MACHINE_ID", "Machine1")  # Change this for different machines
     SERVER_URL = "ws://localhost:8000/ws/monitor"  # Use localhost for development
     
     # Create sensor manager
     sensor_manager = SensorManager(MACHINE_ID, SERVER_URL)
     
-    # Run monitoring
-    asyncio.run(sensor_manager.run_monitoring_loop())
-    
-    # Run monitoring
+    # Run monitoring (on uvloop when installed; it has no Windows build)
+    if sys.platform != 'win32':
+        try:
+            import uvloop
+            uvloop.install()
+        except ImportError:
+            pass
     asyncio.run(sensor_manager.run_monitoring_loop())
@@ -1,12 +1,14 @@
 import csv
-from typing import List, Set, Dict, Any
+from collections import deque
+from typing import List, Set, Dict, Any, Optional
 from datetime import datetime
-import random
 import asyncio
-import json
+import hashlib
+import orjson
 import logging
 import os
 import sys
+import time
 import warnings
 from contextlib import asynccontextmanager
 
@@ -17,11 +19,24 @@ warnings.filterwarnings('ignore', category=UserWarning, module='sklearn')
 logger = logging.getLogger("pharma_downtime")
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 
-from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
-from fastapi.responses import HTMLResponse
+from fastapi import FastAPI, Header, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import HTMLResponse, ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 
+# uvloop / httptools (from uvicorn[standard]) are optional - uvicorn falls back
+# to the asyncio loop and h11 parser without them (e.g. on Windows)
+try:
+    import uvloop
+    UVLOOP_AVAILABLE = True
+except ImportError:
+    UVLOOP_AVAILABLE = False
+try:
+    import httptools
+    HTTPTOOLS_AVAILABLE = True
+except ImportError:
+    HTTPTOOLS_AVAILABLE = False
+
 # Import temperature detection modules
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'temperature_detection', 'src'))
 
@@ -33,19 +48,28 @@ except ImportError:
     logger.warning("DS18B20 temperature detection modules not available")
 
 # Import configuration
-from app.core.config import settings
+from app.core.config import settings, SHIFT_BY_HOUR
+from app.core.ws_manager import ConnectionManager
+from app.ml.model import load_model, predict_downtime
 
 # Create lifespan context manager for startup/shutdown events
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
+    from app.services.database_service import db_service, init_db
+    if settings.CREATE_TABLES:
+        init_db()
+    # Deserialize the model before serving, not inside the first /predict
+    await asyncio.to_thread(load_model)
     logger.info("🚀 Starting sensor monitoring...")
     task = asyncio.create_task(sensor_manager.start_monitoring())
+    flush_task = asyncio.create_task(db_service.run_sensor_flusher())
     yield
     # Shutdown
     logger.info("🛑 Shutting down sensor monitoring...")
     sensor_manager.running = False
     task.cancel()
+    flush_task.cancel()
     if RASPBERRY_PI and hardware_sensors:
         try:
             import RPi.GPIO as GPIO
@@ -56,11 +80,16 @@ async def lifespan(app: FastAPI):
 
 app = FastAPI(
     title="Pharma Downtime Monitoring System",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
-# List to keep track of connected WebSocket clients
-connected_websockets = []
+# Connected dashboard (/ws) clients, each with its own outbox and writer task
+dashboard_ws = ConnectionManager()
+
+# WebSocket keepalive (RFC 6455 ping/pong, handled by uvicorn), in seconds
+WS_PING_INTERVAL = 20
+WS_PING_TIMEOUT = 20
 
 # CORS middleware
 app.add_middleware(
@@ -81,7 +110,9 @@ sensor_data = {
     "load": {"value": 75.0, "status": "offline", "unit": "%", "type": "machine_load"}
 }
 
-events_log = []
+# Most recent events first; appendleft evicts the oldest past EVENTS_LOG_SIZE
+EVENTS_LOG_SIZE = 50
+events_log = deque(maxlen=EVENTS_LOG_SIZE)
 
 # Determine if we're running on Raspberry Pi
 RASPBERRY_PI = settings.RASPBERRY_PI_MODE
@@ -202,8 +233,19 @@ class SensorManager:
             self.mode = "DEVELOPMENT MODE - NO HARDWARE"
         self.read_errors = 0
         self.hardware = hardware_sensors
+        # Event "time" label only changes once a minute; reformat it only then
+        self._event_minute = None
+        self._event_time_str = ""
         logger.info(f"🚀 SensorManager initialized in {self.mode} mode")
         
+    def event_time_label(self, now):
+        """'%I:%M %p' label for an event, formatted once per minute"""
+        minute = (now.hour, now.minute)
+        if minute != self._event_minute:
+            self._event_time_str = now.strftime("%I:%M %p")
+            self._event_minute = minute
+        return self._event_time_str
+        
     def read_real_dht22(self):
         """Read DHT22 ambient temperature and humidity"""
         if not self.hardware or not self.hardware.get('dht22'):
@@ -365,17 +407,10 @@ class SensorManager:
             current = sensor_data["current"]["value"]
             
             # Get current shift
-            current_hour = datetime.now().hour
-            if 6 <= current_hour < 14:
-                shift = 1  # Day
-            elif 14 <= current_hour < 22:
-                shift = 2  # Evening
-            else:
-                shift = 3  # Night
+            shift = SHIFT_BY_HOUR[time.localtime().tm_hour]
             
             # Try to use ML model for prediction
             try:
-                from app.ml.model import predict_downtime
                 ml_result = predict_downtime(amb_temp, machine_temp, humidity, vibration, current, shift)
                 ml_risk = ml_result['downtime_probability']
                 
@@ -454,8 +489,6 @@ class SensorManager:
     
     async def log_event(self):
         """Log sensor readings as events only when sensors are actually connected and providing real data"""
-        global events_log
-        
         # Only log events if we have real sensor data (not "not_connected" status)
         if (sensor_data["temperature"]["status"] == "not_connected" and 
             sensor_data["machine_temperature"]["status"] == "not_connected" and
@@ -482,7 +515,7 @@ class SensorManager:
             return
         
         event = {
-            "time": now.strftime("%I:%M %p"),
+            "time": self.event_time_label(now),
             "machine": machine_name,
             "ambient_temp": f"{amb_temp}°C" if amb_temp != "N/A" else "N/A",
             "machine_temp": f"{machine_temp}°C" if machine_temp != "N/A" else "N/A", 
@@ -490,13 +523,12 @@ class SensorManager:
             "load": f"{load}%" if load != "N/A" else "N/A",
             "risk": f"{risk_score*100:.1f}%",
             "status": status,
-            "timestamp": now.isoformat(),
+            "timestamp": now,  # orjson writes datetimes as ISO 8601
             "mode": self.mode,
             "raspberry_pi": RASPBERRY_PI
         }
         
-        events_log.insert(0, event)
-        events_log = events_log[:50]  # Keep last 50 events
+        events_log.appendleft(event)  # Keeps the last 50 events
         
         # Save to database every 10th reading (to avoid too frequent DB writes)
         if len(events_log) % 10 == 0:
@@ -515,18 +547,15 @@ class SensorManager:
             except Exception as e:
                 logger.warning(f"Database logging failed: {e}")
         
-        # Send to connected websockets
-        for websocket in connected_websockets:
-            try:
-                await websocket.send_text(json.dumps({
-                    "type": "new_event",
-                    "data": event
-                }))
-            except:
-                connected_websockets.remove(websocket) if websocket in connected_websockets else None
+        # Send to connected websockets (encoded once for all of them)
+        await dashboard_ws.broadcast_raw(orjson.dumps({"type": "new_event", "data": event}).decode())
     
     async def start_monitoring(self):
         """Start continuous sensor monitoring"""
+        # A second loop would double every sensor read, event and broadcast
+        if self.running:
+            logger.warning("Sensor monitoring is already running")
+            return
         self.running = True
         logger.info(f"🔄 Starting sensor monitoring in {self.mode} mode...")
         
@@ -534,19 +563,15 @@ class SensorManager:
             await self.read_sensors()
             await self.log_event()
             
-            # Send sensor updates via websocket
-            for websocket in connected_websockets:
-                try:
-                    await websocket.send_text(json.dumps({
-                        "type": "sensor_update",
-                        "data": {
-                            **sensor_data,
-                            "mode": self.mode,
-                            "raspberry_pi": RASPBERRY_PI
-                        }
-                    }))
-                except:
-                    pass
+            # Send sensor updates via websocket (encoded once for all of them)
+            await dashboard_ws.broadcast_raw(orjson.dumps({
+                "type": "sensor_update",
+                "data": {
+                    **sensor_data,
+                    "mode": self.mode,
+                    "raspberry_pi": RASPBERRY_PI
+                }
+            }).decode())
             
             await asyncio.sleep(2 if RASPBERRY_PI else 3)  # Faster on real Pi
 
@@ -990,6 +1015,11 @@ dashboard_html = """
 </html>
 """
 
+# The dashboard never changes at runtime: encode it and hash its ETag once
+DASHBOARD_BYTES = dashboard_html.encode("utf-8")
+DASHBOARD_ETAG = f'"{hashlib.md5(DASHBOARD_BYTES).hexdigest()}"'
+DASHBOARD_HEADERS = {"ETag": DASHBOARD_ETAG, "Cache-Control": "public, max-age=300"}
+
 # API Routes
 from app.routes.predict import router as predict_router
 from app.routes.dashboard_api import router as dashboard_router
@@ -998,8 +1028,10 @@ app.include_router(predict_router)
 app.include_router(dashboard_router)
 
 @app.get("/", response_class=HTMLResponse)
-async def dashboard():
-    return dashboard_html
+async def dashboard(if_none_match: Optional[str] = Header(None)):
+    if if_none_match == DASHBOARD_ETAG:
+        return Response(status_code=304, headers=DASHBOARD_HEADERS)
+    return Response(content=DASHBOARD_BYTES, media_type="text/html; charset=utf-8", headers=DASHBOARD_HEADERS)
 
 @app.get("/api/sensors")
 async def get_sensors():
@@ -1011,46 +1043,51 @@ async def get_sensors():
 
 @app.get("/api/events")
 async def get_events():
-    return events_log
+    return list(events_log)
 
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
-    await websocket.accept()
-    connected_websockets.append(websocket)
+    # All sends go through the client's outbox, so they never interleave
+    await dashboard_ws.connect(websocket)
     
     try:
         # Send initial data
-        await websocket.send_text(json.dumps({
+        await dashboard_ws.send_raw(websocket, orjson.dumps({
             "type": "sensor_update",
             "data": {
                 **sensor_data,
                 "mode": sensor_manager.mode,
                 "raspberry_pi": RASPBERRY_PI
             }
-        }))
+        }).decode())
         
+        # Idle connections are kept alive by uvicorn's protocol-level pings
         while True:
-            try:
-                data = await asyncio.wait_for(websocket.receive_text(), timeout=1.0)
-                await websocket.send_text(f"Received: {data}")
-            except asyncio.TimeoutError:
-                # Keep alive ping
-                await websocket.send_text(json.dumps({"type": "ping"}))
-                
+            data = await websocket.receive_text()
+            await dashboard_ws.send_raw(websocket, f"Received: {data}")
+            
     except WebSocketDisconnect:
-        if websocket in connected_websockets:
-            connected_websockets.remove(websocket)
+        await dashboard_ws.disconnect(websocket)
 
 if __name__ == "__main__":
     logger.info("🚀 Starting Pharma Downtime Monitoring System...")
     logger.info(f"📍 Mode: {sensor_manager.mode}")
     logger.info(f"🔧 Raspberry Pi: {'Yes' if RASPBERRY_PI else 'No'}")
     logger.info("🌐 Dashboard will be available at: http://localhost:8000")
+    logger.info(f"⚡ Event loop: {'uvloop' if UVLOOP_AVAILABLE else 'asyncio'}")
     
     uvicorn.run(
         app, 
         host="0.0.0.0", 
         port=8000, 
         log_level="info",
-        reload=False  # Set to True for development
+        loop="uvloop" if UVLOOP_AVAILABLE else "asyncio",
+        http="httptools" if HTTPTOOLS_AVAILABLE else "h11",
+        ws="websockets",
+        ws_ping_interval=WS_PING_INTERVAL,
+        ws_ping_timeout=WS_PING_TIMEOUT,
+        # Frames are small JSON broadcast to every client; per-connection
+        # deflate would compress each one N times for little saving
+        ws_per_message_deflate=False,
+        reload=False  # The reloader's supervisor process does not run on uvloop
     )